@@ -1,29 +1,64 @@
-import random, shutil, subprocess, copy
-from .movegen import legal_moves, make_move, in_check
-from .board import idx_to_alg, alg_to_idx
+import random, shutil, atexit, os
+from .movegen import legal_moves
+from .board import START_BOARD, uci_to_move
+from .bitboard import Position
+from .fen import board_to_fen
+from .evaluation import evaluate
+from .tt import TranspositionTable
+from .search import iterative_deepening, SearchInfo, MAX_DEPTH
+from .parallel import ParallelSearch
+from .book import PolyglotBook, BOOK_FILE
+from .bitbase import open_bitbases
+from .timecontrol import UNTIMED_BUDGET
+from .uci_client import EnginePool, UCIError
 
-PIECE_VALUES = {'P':100,'N':320,'B':330,'R':500,'Q':900,'K':10000}
+TT_SIZE_MB = 16
+TT = TranspositionTable(TT_SIZE_MB)
+SEARCH_WORKERS = 1   # processes for Complexe/Impossible; above 1 the search runs Lazy SMP (engine.parallel)
+_parallel = None
+
+_book = None
+
+def opening_book():
+    """Livre Polyglot BOOK_FILE ouvert au premier besoin, None s'il n'existe pas"""
+    global _book
+    if _book is None and os.path.exists(BOOK_FILE):
+        _book = PolyglotBook(BOOK_FILE)
+    return _book
+
+def position(game_state):
+    """Position du camp au trait (les noirs si game_state ne le précise pas, comme contre l'humain),
+    avec les clés des positions précédentes de la partie pour reconnaître les répétitions"""
+    pos = Position.from_board(game_state['board'], game_state.get('white_to_move', False),
+                              game_state['can_castle'], game_state['en_passant'])
+    pos.keys = list(game_state.get('keys', ()))
+    pos.halfmove = game_state.get('halfmove', 0)
+    return pos
+
+def book_move(game_state):
+    book = opening_book()
+    if book is None:
+        return None
+    pos = position(game_state)
+    choice = book.choose(pos)
+    return choice[0] if choice else None
+
+def with_book(ai_func):
+    """Le niveau joue un coup du livre tant qu'il y en a un, puis cherche"""
+    def play(game_state):
+        return book_move(game_state) or ai_func(game_state)
+    return play
 
 def evaluate_board(board):
-    score = 0
-    for r in range(8):
-        for c in range(8):
-            p = board[r][c]
-            if p=='.': continue
-            val = PIECE_VALUES.get(p.upper(),0)
-            if p.isupper():
-                score += val
-            else:
-                score -= val
-    return score
+    return evaluate(Position.from_board(board))
 
 def ai_easy(game_state):
-    moves = legal_moves(game_state['board'], False, game_state['can_castle'], game_state['en_passant'])
+    moves = legal_moves(game_state['board'], game_state.get('white_to_move', False), game_state['can_castle'], game_state['en_passant'])
     if not moves: return None
     return random.choice(moves)
 
 def ai_naive(game_state):
-    moves = legal_moves(game_state['board'], False, game_state['can_castle'], game_state['en_passant'])
+    moves = legal_moves(game_state['board'], game_state.get('white_to_move', False), game_state['can_castle'], game_state['en_passant'])
     if not moves: return None
     captures = []
     for m in moves:
@@ -38,126 +73,156 @@ def ai_naive(game_state):
     return random.choice(moves)
 
 def ai_normal(game_state):
-    moves = legal_moves(game_state['board'], False, game_state['can_castle'], game_state['en_passant'])
+    pos = position(game_state)
+    sign = 1 if pos.white else -1
+    moves = pos.legal_moves()
     if not moves: return None
     best = None
     best_score = -10**9
     for m in moves:
-        nb, ncst, nep = make_move(game_state['board'], m, game_state['can_castle'], game_state['en_passant'])
-        sc = -evaluate_board(nb)
+        undo = pos.make_move(m)
+        sc = sign * evaluate(pos)
+        pos.unmake_move(undo)
         if sc > best_score or (sc==best_score and random.random() < 0.1):
             best_score = sc; best = m
     return best
 
-def minimax_ab(board, depth, alpha, beta, white, can_castle, en_passant):
-    if depth==0:
-        return evaluate_board(board), None
-    moves = legal_moves(board, white, can_castle, en_passant)
-    if not moves:
-        if in_check(board, white):
-            return (-1000000 if white else 1000000), None
-        else:
-            return 0, None
-    best_move = None
-    if white:
-        value = -10**9
-        for m in moves:
-            nb, ncst, nep = make_move(board, m, can_castle, en_passant)
-            sc, _ = minimax_ab(nb, depth-1, alpha, beta, not white, ncst, nep)
-            if sc > value:
-                value = sc; best_move = m
-            alpha = max(alpha, value)
-            if alpha >= beta:
-                break
-        return value, best_move
+def parallel_search(workers):
+    """Pool de recherche parallèle partagé, recréé si le nombre de processus ou la taille de table change"""
+    global _parallel
+    if _parallel is not None and (_parallel.workers != workers or _parallel.tt.size_mb != TT_SIZE_MB):
+        _parallel.close()
+        _parallel = None
+    if _parallel is None:
+        _parallel = ParallelSearch(workers, TT_SIZE_MB)
+    return _parallel
+
+def set_hash(size_mb):
+    """Taille (Mo) des tables de transposition de l'IA ; le pool parallèle suit à sa prochaine recherche"""
+    global TT_SIZE_MB
+    TT_SIZE_MB = size_mb
+    TT.resize(size_mb)
+
+def clear_hash():
+    """Nouvelle partie : tables de transposition vidées, celle du pool parallèle comprise"""
+    TT.clear()
+    if _parallel is not None:
+        _parallel.tt.clear()
+
+@atexit.register
+def _close_parallel():
+    if _parallel is not None:
+        _parallel.close()
+
+def ai_complex(game_state, depth=4, tt=None):
+    """game_state['stats'], si présent, reçoit les noeuds et la profondeur de la recherche ;
+    game_state['on_iteration'] est passé à iterative_deepening"""
+    pos = position(game_state)
+    soft, hard = game_state.get('time_budget') or UNTIMED_BUDGET
+    workers = game_state.get('workers') or SEARCH_WORKERS
+    if workers > 1 and tt is None:
+        move, score, info = parallel_search(workers).search(pos, depth, soft, hard, game_state.get('cancel'),
+                                                            game_state.get('on_iteration'), game_state.get('ponder'))
     else:
-        value = 10**9
-        for m in moves:
-            nb, ncst, nep = make_move(board, m, can_castle, en_passant)
-            sc, _ = minimax_ab(nb, depth-1, alpha, beta, not white, ncst, nep)
-            if sc < value:
-                value = sc; best_move = m
-            beta = min(beta, value)
-            if alpha >= beta:
-                break
-        return value, best_move
-
-def ai_complex(game_state, depth=3):
-    board = game_state['board']
-    can_castle = game_state['can_castle']
-    en_passant = game_state['en_passant']
-    score, move = minimax_ab(board, depth, -10**9, 10**9, False, can_castle, en_passant)
+        info = SearchInfo(TT if tt is None else tt)
+        info.cancel = game_state.get('cancel')
+        info.ponder = game_state.get('ponder')
+        info.bitbases = open_bitbases()
+        move, score = iterative_deepening(pos, depth, soft, hard, info, game_state.get('on_iteration'))
+    stats = game_state.get('stats')
+    if stats is not None:
+        stats['nodes'] = stats.get('nodes', 0) + info.nodes
+        stats['depth'] = info.depth
     return move
 
-def stockfish_bestmove(game_state, think_time=0.1):
-    def board_to_fen(board, white_to_move, can_castle, en_passant):
-        rows=[]
-        for r in range(8):
-            empty=0; rowstr=""
-            for c in range(8):
-                p=board[r][c]
-                if p=='.':
-                    empty+=1
-                else:
-                    if empty>0:
-                        rowstr += str(empty); empty=0
-                    rowstr += p
-            if empty>0: rowstr += str(empty)
-            rows.append(rowstr)
-        fen_board = "/".join(rows)
-        fen_side = 'w' if white_to_move else 'b'
-        rights = ''
-        if can_castle.get('K', False): rights += 'K'
-        if can_castle.get('Q', False): rights += 'Q'
-        if can_castle.get('k', False): rights += 'k'
-        if can_castle.get('q', False): rights += 'q'
-        if rights=='' : rights = '-'
-        if en_passant:
-            ep = idx_to_alg(*en_passant)
-        else:
-            ep = '-'
-        fen = f"{fen_board} {fen_side} {rights} {ep} 0 1"
-        return fen
-    sf_path = shutil.which('stockfish')
-    if not sf_path:
+PONDER_LEVELS = ('Complexe', 'Impossible')
+
+def expected_reply(game_state, move):
+    """Réponse attendue de l'adversaire après move : le coup de la table de transposition, ou None"""
+    pos = position(game_state)
+    pos.make_move(move)
+    tt = _parallel.tt if _parallel is not None else TT
+    entry = tt.probe(pos.key)
+    if entry and entry[3] in pos.legal_moves():
+        return entry[3]
+    return None
+
+STOCKFISH_POOL_SIZE = 2
+_engine_pool = None
+
+def engine_pool():
+    """Pool de sessions Stockfish partagé par toutes les parties (créé au premier besoin), None sans Stockfish"""
+    global _engine_pool
+    if _engine_pool is None:
+        sf_path = shutil.which('stockfish')
+        if not sf_path:
+            return None
+        _engine_pool = EnginePool([sf_path], size=STOCKFISH_POOL_SIZE)
+        atexit.register(_engine_pool.close)
+    return _engine_pool
+
+def _uci_position(game_state, white):
+    """('moves', liste) si les coups joués depuis le départ redonnent la position, sinon ('fen', fen)"""
+    board, can_castle, en_passant = game_state['board'], game_state['can_castle'], game_state['en_passant']
+    moves = game_state.get('moves')
+    if moves is not None:
+        pos = Position.from_board(START_BOARD, True, {'K':True,'Q':True,'k':True,'q':True}, None)
+        try:
+            for s in moves:
+                move, promo = uci_to_move(s)
+                pos.make_move(move, promo)
+        except (ValueError, KeyError):
+            pos = None
+        if pos is not None and pos.key == Position.from_board(board, white, can_castle, en_passant).key:
+            return 'moves', moves
+    return 'fen', board_to_fen(board, white, can_castle, en_passant)
+
+def stockfish_bestmove(game_state, think_time=None, pool=None):
+    if pool is None:
+        pool = engine_pool()
+    if pool is None:
         return None
+    white = game_state.get('white_to_move', False)
+    kind, value = _uci_position(game_state, white)
+    limits = {}
+    clock = game_state.get('remaining_time')
+    if game_state.get('total_time') and clock:
+        limits['wtime'], limits['btime'] = clock['W'], clock['B']
+    elif think_time is not None:
+        limits['movetime'] = think_time
+    else:
+        limits['movetime'] = (game_state.get('time_budget') or UNTIMED_BUDGET)[0]
     try:
-        fen = board_to_fen(game_state['board'], True, game_state['can_castle'], game_state['en_passant'])
-        proc = subprocess.Popen([sf_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
-        proc.stdin.write(f"position fen {fen}\n")
-        proc.stdin.write(f"go movetime {int(think_time*1000)}\n")
-        proc.stdin.flush()
-        bestmove = None
-        while True:
-            line = proc.stdout.readline()
-            if not line:
-                break
-            line = line.strip()
-            if line.startswith("bestmove"):
-                parts = line.split()
-                if len(parts) >= 2:
-                    bestmove = parts[1]
-                break
-        proc.stdin.write("quit\n"); proc.stdin.flush()
-        proc.terminate()
-        if not bestmove:
-            return None
-        from_sq = bestmove[0:2]; to_sq = bestmove[2:4]
-        return (alg_to_idx(from_sq), alg_to_idx(to_sq))
-    except Exception:
+        with pool.session(game_state.get('game_id')) as session:
+            if kind == 'moves':
+                best = session.go(moves=value, **limits)
+            else:
+                best = session.go(fen=value, **limits)
+    except UCIError:
+        return None
+    if not best:
+        return None
+    try:
+        move, promo = uci_to_move(best)
+    except ValueError:
         return None
+    if promo:
+        promo = promo.upper() if white else promo.lower()
+    return move, promo
 
 def ai_impossible(game_state):
-    # longer think time for best effort via Stockfish; fallback to deep minimax
-    m = stockfish_bestmove(game_state, think_time=150)
-    if m:
-        return m
-    return ai_complex(game_state, depth=4)
+    """Stockfish par une session persistante, sinon notre recherche limitée en temps ;
+    une sous-promotion choisie par Stockfish est rangée dans game_state['promotion']"""
+    best = stockfish_bestmove(game_state)
+    if best:
+        move, game_state['promotion'] = best
+        return move
+    return ai_complex(game_state, depth=MAX_DEPTH)
 
 AI_BY_NAME = {
     'Facile': ai_easy,
     'Naïve': ai_naive,
-    'Normal': ai_normal,
-    'Complexe': lambda gs: ai_complex(gs, depth=3),
-    'Impossible': ai_impossible
+    'Normal': with_book(ai_normal),
+    'Complexe': with_book(lambda gs: ai_complex(gs, depth=4)),
+    'Impossible': with_book(ai_impossible)
 }
\ No newline at end of file
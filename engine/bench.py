@@ -0,0 +1,46 @@
+"""Banc d'essai de la recherche : profondeur fixe sur les positions de référence.
+
+    python -m engine.bench --depth 4
+    python -m engine.bench --depth 4 --no-ordering     # pour mesurer le gain du tri des coups
+"""
+import argparse, sys, time
+from .bitboard import Position
+from .fen import parse_fen
+from .perft import POSITIONS, move_name
+from .search import SearchInfo, iterative_deepening
+from .tt import TranspositionTable
+
+def bench_position(fen, depth, hash_mb=16, ordering=True, quiescence=True):
+    board, white, can_castle, en_passant, _, _ = parse_fen(fen)
+    pos = Position.from_board(board, white, can_castle, en_passant)
+    info = SearchInfo(TranspositionTable(hash_mb))
+    info.ordering = ordering
+    info.quiescence = quiescence
+    t0 = time.perf_counter()
+    move, score = iterative_deepening(pos, depth, info=info)
+    return move, score, time.perf_counter() - t0, info
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai de la recherche alpha-bêta")
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--hash', type=float, default=16, help="taille de la table de transposition (Mo)")
+    parser.add_argument('--no-ordering', action='store_true', help="coups dans l'ordre du générateur")
+    parser.add_argument('--no-quiescence', action='store_true', help="évaluation directe aux feuilles")
+    args = parser.parse_args(argv)
+
+    total_nodes = 0; total_time = 0.0; cutoffs = 0; first = 0
+    for name, fen, _ in POSITIONS:
+        move, score, dt, info = bench_position(fen, args.depth, args.hash, not args.no_ordering, not args.no_quiescence)
+        stats = info.stats()
+        total_nodes += info.nodes; total_time += dt
+        cutoffs += info.cutoffs; first += info.first_cutoffs
+        print(f"{name:<12} {move_name(move) if move else '-':<6} score {score:>8}  nodes {info.nodes:>8} (q {info.qnodes:>7})  "
+              f"{dt:6.2f}s  {info.nodes/dt if dt else 0:8.0f} nps  1er coup {stats['first_move_cutoff_rate']:.0%}  "
+              f"tt {stats['tt']['hit_rate']:.0%}")
+    rate = first / cutoffs if cutoffs else 0.0
+    print(f"Total: {total_nodes} noeuds en {total_time:.2f}s ({total_nodes/total_time if total_time else 0:.0f} nps), "
+          f"coupures au 1er coup {rate:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""Bitbases des finales triviales (KQK, KRK, KPK) : un bit par position, gain du camp fort ou nulle,
+calculées hors ligne par analyse rétrograde et lues par mmap pendant la recherche.
+Dans KPK une promotion gagne si la position obtenue gagne en KQK ou en KRK (la promotion en tour évite
+certains pats) ; un fou ou un cavalier seul ne peut pas mater, ces promotions-là ne gagnent jamais.
+
+    python -m engine.bitbase build            # écrit bitbases.bin (moins d'une minute)
+    python -m engine.bitbase probe --fen "8/8/8/4k3/8/8/4P3/4K3 w - - 0 1"
+"""
+import argparse, mmap, os, struct, sys, time
+from array import array
+from .bitboard import Position, BIT, KING_ATTACKS
+from .evaluation import PIECE_VALUES
+from .fen import parse_fen
+from .movegen import legal_moves
+
+MAGIC = b'CBB1'
+TABLES = ('KQK', 'KRK', 'KPK')   # KPK last: its promotions are looked up in KQK and KRK
+SIZE = 2 * 64 * 64 * 64          # side to move (0 = strong side) x strong king x weak king x piece
+KNOWN_WIN = 20000                # well below MATE_BOUND; a real mate found by the search still scores higher
+BITBASE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bitbases.bin')
+
+def index(stm, sk, wk, ps):
+    return ((stm*64 + sk)*64 + wk)*64 + ps
+
+def _solve(piece, promotions=()):
+    """Gains du camp fort (blanc, pièce piece) par propagation arrière depuis les mats :
+    camp fort au trait gagnant si un coup mène à un gain, camp faible au trait perdant si tous ses coups y mènent.
+    promotions : tables déjà calculées des pièces auxquelles le pion peut aboutir"""
+    win = bytearray(SIZE)
+    remaining = bytearray(SIZE)   # weak side to move: successors not yet known as wins
+    src, dst = array('i'), array('i')
+    queue = []
+    pos = Position()
+    for stm in (0, 1):
+        pos.white = stm == 0
+        for sk in range(64):
+            pos._put('K', sk)
+            for wk in range(64):
+                if wk == sk or KING_ATTACKS[sk] & BIT[wk]:
+                    continue
+                pos._put('k', wk)
+                for ps in range(64):
+                    if ps == sk or ps == wk or (piece == 'P' and (ps < 8 or ps >= 56)):
+                        continue
+                    pos._put(piece, ps)
+                    i = index(stm, sk, wk, ps)
+                    if not pos.in_check(not pos.white):
+                        moves = legal_moves(pos, pos.white, None, None)
+                        if stm == 0:
+                            for (r1,c1),(r2,c2) in moves:
+                                s, t = r1*8+c1, r2*8+c2
+                                if s == sk:
+                                    src.append(i); dst.append(index(1, t, wk, ps))
+                                elif piece == 'P' and t < 8:
+                                    if any(table[index(1, sk, wk, t)] for table in promotions) and not win[i]:
+                                        win[i] = 1
+                                        queue.append(i)
+                                else:
+                                    src.append(i); dst.append(index(1, sk, wk, t))
+                        elif not moves:
+                            if pos.in_check():
+                                win[i] = 1
+                                queue.append(i)
+                        elif not any((r2*8+c2) == ps for _, (r2,c2) in moves):   # taking the piece draws
+                            remaining[i] = len(moves)
+                            for _, (r2,c2) in moves:
+                                src.append(i); dst.append(index(0, sk, r2*8+c2, ps))
+                    pos._remove(ps)
+                pos._remove(wk)
+            pos._remove(sk)
+    # predecessors in compressed rows: preds[start[j]:start[j+1]]
+    start = array('i', [0]) * (SIZE + 1)
+    for j in dst:
+        start[j+1] += 1
+    for j in range(SIZE):
+        start[j+1] += start[j]
+    fill = array('i', start)
+    preds = array('i', [0]) * len(dst)
+    for i, j in zip(src, dst):
+        preds[fill[j]] = i
+        fill[j] += 1
+    del src, dst, fill
+    while queue:
+        j = queue.pop()
+        for k in range(start[j], start[j+1]):
+            i = preds[k]
+            if win[i]:
+                continue
+            if i < SIZE // 2:          # strong side to move: one winning move is enough
+                win[i] = 1
+                queue.append(i)
+            else:
+                remaining[i] -= 1
+                if remaining[i] == 0:
+                    win[i] = 1
+                    queue.append(i)
+    return win
+
+def _pack(win):
+    bits = bytearray(SIZE // 8)
+    for i in range(SIZE):
+        if win[i]:
+            bits[i >> 3] |= 1 << (i & 7)
+    return bytes(bits)
+
+def build(path=BITBASE_FILE, verbose=True):
+    tables = {}
+    for name in TABLES:
+        t0 = time.perf_counter()
+        win = _solve(name[1], [tables['KQK'], tables['KRK']] if name == 'KPK' else ())
+        tables[name] = win
+        if verbose:
+            print(f"{name} : {sum(win)} positions gagnantes sur {SIZE} en {time.perf_counter() - t0:.1f}s")
+    header = MAGIC + struct.pack('<I', len(TABLES))
+    offset = len(header) + len(TABLES) * 8
+    with open(path, 'wb') as f:
+        f.write(header)
+        for k, name in enumerate(TABLES):
+            f.write(name.encode().ljust(4, b'\0') + struct.pack('<I', offset + k * SIZE // 8))
+        for name in TABLES:
+            f.write(_pack(tables[name]))
+    return path
+
+
+class Bitbases:
+    """Fichier de bitbases ouvert par mmap ; probe/score ne lisent qu'un octet par position"""
+
+    def __init__(self, path=BITBASE_FILE):
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:4] != MAGIC:
+            raise ValueError(f"{path} n'est pas un fichier de bitbases")
+        count, = struct.unpack_from('<I', self.mm, 4)
+        self.offsets = {}
+        for k in range(count):
+            name = self.mm[8 + k*8: 12 + k*8].rstrip(b'\0').decode()
+            self.offsets[name[1]], = struct.unpack_from('<I', self.mm, 12 + k*8)
+
+    def probe(self, pos):
+        """None si la matière n'est pas couverte, 0 pour nulle, +1 / -1 si les blancs / noirs gagnent"""
+        occ = pos.occ_w | pos.occ_b
+        occ &= occ - 1; occ &= occ - 1
+        if not occ or occ & (occ - 1):
+            return None   # not exactly three men
+        for piece in self.offsets:
+            if pos.bb[piece]:
+                sk, wk, ps = pos.king_square(True), pos.king_square(False), pos.bb[piece].bit_length() - 1
+                stm = 0 if pos.white else 1
+                sign = 1
+                break
+            if pos.bb[piece.lower()]:
+                # black is the strong side: flip the board so that it plays up as white
+                sk, wk = pos.king_square(False) ^ 56, pos.king_square(True) ^ 56
+                ps = (pos.bb[piece.lower()].bit_length() - 1) ^ 56
+                stm = 1 if pos.white else 0
+                sign = -1
+                break
+        else:
+            return None
+        i = index(stm, sk, wk, ps)
+        return sign if self.mm[self.offsets[piece] + (i >> 3)] >> (i & 7) & 1 else 0
+
+    def score(self, pos):
+        """Score (point de vue des blancs) d'une position couverte, None sinon : KNOWN_WIN plus un terme
+        qui pousse le roi faible vers le bord, l'enferme, rapproche le roi fort et fait avancer le pion"""
+        result = self.probe(pos)
+        if not result:
+            return result
+        strong = result > 0
+        sk, wk = pos.king_square(strong), pos.king_square(not strong)
+        (sr, sc), (wr, wc) = divmod(sk, 8), divmod(wk, 8)
+        edge = max(3 - wr, wr - 4) + max(3 - wc, wc - 4)
+        score = KNOWN_WIN + 20*edge + 10*(14 - abs(sr - wr) - abs(sc - wc))
+        pawns = pos.bb['P' if strong else 'p']
+        if pawns:
+            rank = 7 - ((pawns.bit_length() - 1) >> 3) if strong else (pawns.bit_length() - 1) >> 3
+            score += PIECE_VALUES['P'] + 50*rank
+        else:
+            piece = pos.bb['Q' if strong else 'q'] or pos.bb['R' if strong else 'r']
+            score += PIECE_VALUES['Q'] if pos.bb['Q' if strong else 'q'] else PIECE_VALUES['R']
+            # box: the rank and file of the major piece fence the weak king in, the smaller the better
+            pr, pc = divmod(piece.bit_length() - 1, 8)
+            rows = 8 if wr == pr else pr if wr < pr else 7 - pr
+            cols = 8 if wc == pc else pc if wc < pc else 7 - pc
+            score += 3 * (64 - rows * cols)
+        return score * result
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+_opened = {}
+
+def open_bitbases(path=BITBASE_FILE):
+    """Bitbases partagées par le processus, None si le fichier n'a pas été généré"""
+    if path not in _opened:
+        _opened[path] = Bitbases(path) if os.path.exists(path) else None
+    return _opened[path]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bitbases KQK, KRK et KPK")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    b = sub.add_parser('build')
+    b.add_argument('-o', '--out', default=BITBASE_FILE)
+    p = sub.add_parser('probe')
+    p.add_argument('--fen', required=True)
+    p.add_argument('--file', default=BITBASE_FILE)
+    args = parser.parse_args(argv)
+    if args.cmd == 'build':
+        t0 = time.perf_counter()
+        build(args.out)
+        print(f"{args.out} écrit en {time.perf_counter() - t0:.0f}s")
+        return 0
+    bases = Bitbases(args.file)
+    board, white, can_castle, en_passant, _, _ = parse_fen(args.fen)
+    result = bases.probe(Position.from_board(board, white, can_castle, en_passant))
+    print({None: "matière non couverte", 0: "nulle", 1: "gain des blancs", -1: "gain des noirs"}[result])
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+from .zobrist import PIECE_KEYS, SIDE_KEY, CASTLE_KEYS, EP_KEYS
+from .evaluation import MG_TABLE, EG_TABLE, PHASE_WEIGHT
+from .board import BIT, RC, POSITIVE, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, RAYS, BETWEEN, LINE
+
+PIECES = "PNBRQKpnbrqk"
+CASTLE_BITS = {'K': 1, 'Q': 2, 'k': 4, 'q': 8}
+
+FULL = (1 << 64) - 1
+RANK_8 = 0xFF
+RANK_1 = 0xFF << 56
+
+def sq_index(r, c): return r*8 + c
+def lsb(bb): return (bb & -bb).bit_length() - 1
+def msb(bb): return bb.bit_length() - 1
+
+def iter_bits(bb):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+def ray_attacks(s, occ, d):
+    ray = RAYS[d][s]
+    blockers = ray & occ
+    if blockers:
+        b = lsb(blockers) if POSITIVE[d] else msb(blockers)
+        ray ^= RAYS[d][b]
+    return ray
+
+def rook_attacks(s, occ):
+    return ray_attacks(s, occ, 0) | ray_attacks(s, occ, 1) | ray_attacks(s, occ, 2) | ray_attacks(s, occ, 3)
+
+def bishop_attacks(s, occ):
+    return ray_attacks(s, occ, 4) | ray_attacks(s, occ, 5) | ray_attacks(s, occ, 6) | ray_attacks(s, occ, 7)
+
+# castling rights kept after a move touches a square (king or rook home squares)
+CASTLE_MASK = [15]*64
+CASTLE_MASK[56] = 15 & ~2; CASTLE_MASK[63] = 15 & ~1; CASTLE_MASK[60] = 15 & ~3
+CASTLE_MASK[0] = 15 & ~8; CASTLE_MASK[7] = 15 & ~4; CASTLE_MASK[4] = 15 & ~12
+
+
+class Position:
+    """Position sous forme de bitboards (un entier 64 bits par pièce), case s = r*8+c comme dans board[r][c]."""
+
+    def __init__(self):
+        self.bb = dict.fromkeys(PIECES, 0)
+        self.squares = ['.']*64
+        self.occ_w = 0
+        self.occ_b = 0
+        self.white = True
+        self.castle = 0
+        self.ep = None
+        self.key = CASTLE_KEYS[0]
+        self.keys = []       # keys of the earlier positions of the game (pushed by make_move)
+        self.halfmove = 0    # plies since the last capture or pawn move
+        # evaluation terms kept up to date by _put/_remove (see engine.evaluation)
+        self.mg = 0
+        self.eg = 0
+        self.phase = 0
+
+    @classmethod
+    def from_board(cls, board, white=True, can_castle=None, en_passant=None):
+        pos = cls()
+        for r in range(8):
+            for c in range(8):
+                p = board[r][c]
+                if p != '.':
+                    pos._put(p, r*8+c)
+        pos.white = white
+        if can_castle:
+            for k, bit in CASTLE_BITS.items():
+                if can_castle.get(k, False): pos.castle |= bit
+        if en_passant:
+            pos.ep = en_passant[0]*8 + en_passant[1]
+        pos.key ^= CASTLE_KEYS[0] ^ CASTLE_KEYS[pos.castle]
+        if not white: pos.key ^= SIDE_KEY
+        if pos.ep is not None: pos.key ^= EP_KEYS[pos.ep & 7]
+        return pos
+
+    def to_board(self):
+        return [self.squares[r*8:r*8+8] for r in range(8)]
+
+    def to_state(self):
+        """Retourne (board, can_castle, en_passant) au format de make_move"""
+        can_castle = {k: bool(self.castle & bit) for k, bit in CASTLE_BITS.items()}
+        return self.to_board(), can_castle, (RC[self.ep] if self.ep is not None else None)
+
+    def copy(self):
+        pos = Position.__new__(Position)
+        pos.bb = self.bb.copy()
+        pos.squares = self.squares[:]
+        pos.occ_w = self.occ_w; pos.occ_b = self.occ_b
+        pos.white = self.white
+        pos.castle = self.castle
+        pos.ep = self.ep
+        pos.key = self.key
+        pos.keys = self.keys[:]
+        pos.halfmove = self.halfmove
+        pos.mg = self.mg; pos.eg = self.eg; pos.phase = self.phase
+        return pos
+
+    def _put(self, p, s):
+        self.bb[p] |= BIT[s]
+        self.squares[s] = p
+        self.key ^= PIECE_KEYS[p][s]
+        self.mg += MG_TABLE[p][s]
+        self.eg += EG_TABLE[p][s]
+        self.phase += PHASE_WEIGHT[p]
+        if p.isupper(): self.occ_w |= BIT[s]
+        else: self.occ_b |= BIT[s]
+
+    def _remove(self, s):
+        p = self.squares[s]
+        self.bb[p] ^= BIT[s]
+        self.squares[s] = '.'
+        self.key ^= PIECE_KEYS[p][s]
+        self.mg -= MG_TABLE[p][s]
+        self.eg -= EG_TABLE[p][s]
+        self.phase -= PHASE_WEIGHT[p]
+        if p.isupper(): self.occ_w ^= BIT[s]
+        else: self.occ_b ^= BIT[s]
+        return p
+
+    def king_square(self, white):
+        k = self.bb['K' if white else 'k']
+        return lsb(k) if k else None
+
+    def is_attacked(self, s, by_white, occ=None, keep=-1):
+        """keep retire des attaquants (pièce capturée pendant un test de légalité)"""
+        bb = self.bb
+        if occ is None:
+            occ = self.occ_w | self.occ_b
+        if by_white:
+            pawns, knights, king = bb['P'], bb['N'], bb['K']
+            diag, line = bb['B'] | bb['Q'], bb['R'] | bb['Q']
+            pawn_from = PAWN_ATTACKS[1][s]
+        else:
+            pawns, knights, king = bb['p'], bb['n'], bb['k']
+            diag, line = bb['b'] | bb['q'], bb['r'] | bb['q']
+            pawn_from = PAWN_ATTACKS[0][s]
+        if pawn_from & pawns & keep: return True
+        if KNIGHT_ATTACKS[s] & knights & keep: return True
+        if KING_ATTACKS[s] & king: return True
+        if diag & keep and bishop_attacks(s, occ) & diag & keep: return True
+        if line & keep and rook_attacks(s, occ) & line & keep: return True
+        return False
+
+    def attackers(self, s, by_white, occ=None):
+        """Bitboard des pièces de la couleur by_white qui attaquent s"""
+        bb = self.bb
+        if occ is None:
+            occ = self.occ_w | self.occ_b
+        if by_white:
+            att = PAWN_ATTACKS[1][s] & bb['P'] | KNIGHT_ATTACKS[s] & bb['N'] | KING_ATTACKS[s] & bb['K']
+            diag, line = bb['B'] | bb['Q'], bb['R'] | bb['Q']
+        else:
+            att = PAWN_ATTACKS[0][s] & bb['p'] | KNIGHT_ATTACKS[s] & bb['n'] | KING_ATTACKS[s] & bb['k']
+            diag, line = bb['b'] | bb['q'], bb['r'] | bb['q']
+        if diag: att |= bishop_attacks(s, occ) & diag
+        if line: att |= rook_attacks(s, occ) & line
+        return att
+
+    def pinned(self, ksq, white, occ=None):
+        """Pièces de la couleur white clouées sur leur roi (en ksq)"""
+        bb = self.bb
+        if occ is None:
+            occ = self.occ_w | self.occ_b
+        if white:
+            own, diag, line = self.occ_w, bb['b'] | bb['q'], bb['r'] | bb['q']
+        else:
+            own, diag, line = self.occ_b, bb['B'] | bb['Q'], bb['R'] | bb['Q']
+        pinned = 0
+        for sniper in iter_bits(rook_attacks(ksq, 0) & line | bishop_attacks(ksq, 0) & diag):
+            b = BETWEEN[ksq][sniper] & occ
+            if b and not b & (b-1) and b & own:
+                pinned |= b
+        return pinned
+
+    def in_check(self, white=None):
+        if white is None:
+            white = self.white
+        k = self.king_square(white)
+        if k is None:
+            return True
+        return self.is_attacked(k, not white)
+
+    def targets(self, s, captures_only=False):
+        """Cases d'arrivée pseudo-légales (bitboard) de la pièce en s ;
+        captures_only ne garde que les prises, la prise en passant et les promotions"""
+        p = self.squares[s]
+        if p == '.': return 0
+        white = p.isupper()
+        own, enemy = (self.occ_w, self.occ_b) if white else (self.occ_b, self.occ_w)
+        occ = own | enemy
+        P = p.upper()
+        if captures_only and P != 'P':
+            if P == 'K': return KING_ATTACKS[s] & enemy
+            return self.targets(s) & enemy
+        if P == 'N':
+            return KNIGHT_ATTACKS[s] & ~own
+        if P == 'B':
+            return bishop_attacks(s, occ) & ~own
+        if P == 'R':
+            return rook_attacks(s, occ) & ~own
+        if P == 'Q':
+            return (bishop_attacks(s, occ) | rook_attacks(s, occ)) & ~own
+        if P == 'P':
+            att = PAWN_ATTACKS[0 if white else 1][s]
+            t = att & enemy
+            if self.ep is not None and att & BIT[self.ep]:
+                t |= BIT[self.ep]
+            one = s-8 if white else s+8
+            if captures_only:
+                if 0 <= one < 64 and not occ & BIT[one]:
+                    t |= BIT[one] & (RANK_8 | RANK_1)
+                return t
+            if 0 <= one < 64 and not occ & BIT[one]:
+                t |= BIT[one]
+                if (white and s >= 48) or (not white and s < 16):
+                    two = s-16 if white else s+16
+                    if not occ & BIT[two]:
+                        t |= BIT[two]
+            return t
+        t = KING_ATTACKS[s] & ~own
+        t |= self._castle_targets(s, white, occ)
+        return t
+
+    def _castle_targets(self, s, white, occ):
+        t = 0
+        if white:
+            if s != 60 or not self.castle & 3: return 0
+            if self.castle & 1 and self.squares[63] == 'R' and not occ & (BIT[61] | BIT[62]):
+                if not (self.is_attacked(60, False) or self.is_attacked(61, False) or self.is_attacked(62, False)):
+                    t |= BIT[62]
+            if self.castle & 2 and self.squares[56] == 'R' and not occ & (BIT[57] | BIT[58] | BIT[59]):
+                if not (self.is_attacked(60, False) or self.is_attacked(59, False) or self.is_attacked(58, False)):
+                    t |= BIT[58]
+        else:
+            if s != 4 or not self.castle & 12: return 0
+            if self.castle & 4 and self.squares[7] == 'r' and not occ & (BIT[5] | BIT[6]):
+                if not (self.is_attacked(4, True) or self.is_attacked(5, True) or self.is_attacked(6, True)):
+                    t |= BIT[6]
+            if self.castle & 8 and self.squares[0] == 'r' and not occ & (BIT[1] | BIT[2] | BIT[3]):
+                if not (self.is_attacked(4, True) or self.is_attacked(3, True) or self.is_attacked(2, True)):
+                    t |= BIT[2]
+        return t
+
+    def pseudo_moves(self, captures_only=False):
+        moves = []
+        for s in iter_bits(self.occ_w if self.white else self.occ_b):
+            for t in iter_bits(self.targets(s, captures_only)):
+                moves.append((s, t))
+        return moves
+
+    def legal_moves(self, captures_only=False):
+        """Coups légaux générés directement : pièces donnant échec et pièces clouées calculées une fois.
+        En double échec seul le roi bouge ; la prise en passant (clouage horizontal) est vérifiée à part."""
+        white = self.white
+        ksq = self.king_square(white)
+        if ksq is None:
+            return []
+        occ = self.occ_w | self.occ_b
+        checkers = self.attackers(ksq, not white, occ)
+        double = checkers & (checkers - 1)
+        if checkers:
+            c = lsb(checkers)
+            evasions = BETWEEN[ksq][c] | BIT[c]
+        else:
+            evasions = FULL
+        pinned = self.pinned(ksq, white, occ)
+        king_occ = occ ^ BIT[ksq]
+        ep = self.ep
+        moves = []
+        for s in iter_bits(self.occ_w if white else self.occ_b):
+            if s == ksq:
+                for t in iter_bits(self.targets(s, captures_only)):
+                    # castling squares are already checked in _castle_targets
+                    if abs(t - s) == 2 or not self.is_attacked(t, not white, king_occ, ~BIT[t]):
+                        moves.append((RC[s], RC[t]))
+                continue
+            if double:
+                continue
+            targets = self.targets(s, captures_only)
+            ep_legal = 0
+            if ep is not None and targets & BIT[ep] and self.squares[s] in 'Pp':
+                targets ^= BIT[ep]
+                cap = ep+8 if white else ep-8
+                if not self.is_attacked(ksq, not white, occ ^ BIT[s] ^ BIT[cap] | BIT[ep], ~BIT[cap]):
+                    ep_legal = BIT[ep]
+            targets &= evasions
+            if pinned & BIT[s]:
+                targets &= LINE[ksq][s]
+            targets |= ep_legal
+            for t in iter_bits(targets):
+                moves.append((RC[s], RC[t]))
+        return moves
+
+    def make_move(self, move, promote_to=None):
+        """Joue le coup sur place et retourne l'enregistrement d'annulation pour unmake_move"""
+        (r1,c1),(r2,c2) = move
+        s, t = r1*8+c1, r2*8+c2
+        p = self.squares[s]
+        cap_sq = t
+        if p in 'Pp' and t == self.ep:
+            cap_sq = t+8 if p == 'P' else t-8
+        captured = self.squares[cap_sq]
+        rook = None
+        if p in 'Kk' and abs(t-s) == 2:
+            rook = (t+1, t-1) if t > s else (t-2, t+1)
+        undo = (s, t, p, captured, cap_sq, rook, self.castle, self.ep, self.key, self.halfmove)
+        self.keys.append(self.key)
+        self.halfmove = 0 if p in 'Pp' or captured != '.' else self.halfmove + 1
+        self._remove(s)
+        if captured != '.':
+            self._remove(cap_sq)
+        if rook:
+            self._put(self._remove(rook[0]), rook[1])
+        if p in 'Pp' and (r2 == 0 or r2 == 7):
+            q = promote_to or 'Q'
+            self._put(q.upper() if p == 'P' else q.lower(), t)
+        else:
+            self._put(p, t)
+        key = self.key ^ SIDE_KEY ^ CASTLE_KEYS[self.castle]
+        if self.ep is not None: key ^= EP_KEYS[self.ep & 7]
+        self.castle &= CASTLE_MASK[s] & CASTLE_MASK[t]
+        self.ep = (s+t)//2 if p in 'Pp' and abs(t-s) == 16 else None
+        if self.ep is not None: key ^= EP_KEYS[self.ep & 7]
+        self.key = key ^ CASTLE_KEYS[self.castle]
+        self.white = not self.white
+        return undo
+
+    def unmake_move(self, undo):
+        s, t, p, captured, cap_sq, rook, castle, ep, key, self.halfmove = undo
+        self.keys.pop()
+        self.white = not self.white
+        self._remove(t)
+        self._put(p, s)
+        if captured != '.':
+            self._put(captured, cap_sq)
+        if rook:
+            self._put(self._remove(rook[1]), rook[0])
+        self.castle = castle
+        self.ep = ep
+        self.key = key
+
+    def is_repetition(self):
+        """La position est déjà apparue, le même camp au trait, depuis le dernier coup irréversible"""
+        keys, key = self.keys, self.key
+        # positions 4, 6, 8... plies back; a capture or pawn move cannot be undone, so no need to go further
+        for i in range(len(keys) - 4, len(keys) - self.halfmove - 1, -2):
+            if i < 0:
+                break
+            if keys[i] == key:
+                return True
+        return False
@@ -40,4 +40,73 @@ def alg_to_idx(s):
         raise ValueError("Format invalide")
     col = FILES.index(s[0])
     row = 8 - int(s[1])
-    return row, col
\ No newline at end of file
+    return row, col
+
+def move_to_uci(move, promote_to=None):
+    (r1,c1),(r2,c2) = move
+    return idx_to_alg(r1,c1) + idx_to_alg(r2,c2) + (promote_to.lower() if promote_to else '')
+
+def uci_to_move(s):
+    """'e7e8q' -> (((1,4),(0,4)), 'q') ; la promotion vaut None si absente"""
+    s = s.strip()
+    if len(s) not in (4, 5):
+        raise ValueError("Format invalide")
+    return (alg_to_idx(s[0:2]), alg_to_idx(s[2:4])), (s[4] if len(s) == 5 else None)
+
+# ----- geometry tables, computed once at import; square s = r*8+c as in board[r][c] -----
+BIT = [1 << s for s in range(64)]
+RC = [(s >> 3, s & 7) for s in range(64)]
+
+KNIGHT_OFFSETS = [(-2,-1),(-2,1),(-1,-2),(-1,2),(1,-2),(1,2),(2,-1),(2,1)]
+KING_OFFSETS = [(dr,dc) for dr in (-1,0,1) for dc in (-1,0,1) if dr or dc]
+# sliding directions as (dr, dc); a positive step means a growing square index; d ^ 1 is the opposite direction
+DIRECTIONS = [(-1,0),(1,0),(0,-1),(0,1),(-1,-1),(-1,1),(1,-1),(1,1)]
+POSITIVE = [dr*8+dc > 0 for dr, dc in DIRECTIONS]
+
+def _targets(s, offsets):
+    r, c = RC[s]
+    return [(r+dr)*8 + c+dc for dr, dc in offsets if on_board(r+dr, c+dc)]
+
+def _ray(s, dr, dc):
+    r, c = RC[s]
+    squares = []
+    r += dr; c += dc
+    while on_board(r, c):
+        squares.append(r*8+c)
+        r += dr; c += dc
+    return squares
+
+def _bits(squares):
+    m = 0
+    for s in squares:
+        m |= BIT[s]
+    return m
+
+# target squares as lists ...
+KNIGHT_TARGETS = [_targets(s, KNIGHT_OFFSETS) for s in range(64)]
+KING_TARGETS = [_targets(s, KING_OFFSETS) for s in range(64)]
+# PAWN_TARGETS[0][s]: squares a white pawn on s attacks, [1] the same for black
+PAWN_TARGETS = ([_targets(s, [(-1,-1),(-1,1)]) for s in range(64)],
+                [_targets(s, [(1,-1),(1,1)]) for s in range(64)])
+# RAY_SQUARES[d][s]: squares met walking from s in direction d, nearest first
+RAY_SQUARES = [[_ray(s, dr, dc) for s in range(64)] for dr, dc in DIRECTIONS]
+
+# ... and as bitboards
+KNIGHT_ATTACKS = [_bits(t) for t in KNIGHT_TARGETS]
+KING_ATTACKS = [_bits(t) for t in KING_TARGETS]
+PAWN_ATTACKS = tuple([_bits(t) for t in side] for side in PAWN_TARGETS)
+RAYS = [[_bits(ray) for ray in rays] for rays in RAY_SQUARES]
+
+def _between_and_line():
+    between = [[0]*64 for _ in range(64)]
+    line = [[0]*64 for _ in range(64)]
+    for s in range(64):
+        for d, rays in enumerate(RAY_SQUARES):
+            full = RAYS[d][s] | RAYS[d ^ 1][s] | BIT[s]
+            for i, t in enumerate(rays[s]):
+                between[s][t] = _bits(rays[s][:i])
+                line[s][t] = full
+    return between, line
+
+# BETWEEN[a][b]: squares strictly between two aligned squares; LINE[a][b]: whole line through both (0 if not aligned)
+BETWEEN, LINE = _between_and_line()
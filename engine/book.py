@@ -0,0 +1,190 @@
+"""Livre d'ouvertures au format Polyglot (.bin) : entrées de 16 octets triées par clé,
+lues par mmap et trouvées par recherche dichotomique, sans charger le fichier.
+
+    python -m engine.book build parties.pgn -o book.bin --plies 16
+    python -m engine.book probe book.bin [--fen "..."]
+    python -m engine.book bench book.bin
+"""
+import argparse, mmap, os, random, struct, sys, time
+from .bitboard import Position, PAWN_ATTACKS
+from .board import RC, move_to_uci
+from .fen import parse_fen, START_FEN
+from .pgn import read_games, parse_san, start_position
+from .polyglot_random import RANDOM64
+
+ENTRY = struct.Struct('>QHHI')   # key, move, weight, learn
+KEY = struct.Struct('>Q')
+PG_PIECE = {p: i for i, p in enumerate("pPnNbBrRqQkK")}   # Polyglot piece order: black then white, per type
+PG_CASTLE = ((1, 768), (2, 769), (4, 770), (8, 771))     # CASTLE_BITS K, Q, k, q
+PROMOTIONS = " nbrq"
+BOOK_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'book.bin')
+
+def polyglot_key(pos):
+    """Clé Zobrist Polyglot de la position (cases comptées depuis a1, d'où s ^ 56)"""
+    key = 0
+    for s, p in enumerate(pos.squares):
+        if p != '.':
+            key ^= RANDOM64[64 * PG_PIECE[p] + (s ^ 56)]
+    for bit, i in PG_CASTLE:
+        if pos.castle & bit:
+            key ^= RANDOM64[i]
+    # the en-passant file only counts when a pawn of the side to move can actually take
+    if pos.ep is not None:
+        pawns = pos.bb['P'] if pos.white else pos.bb['p']
+        if PAWN_ATTACKS[1 if pos.white else 0][pos.ep] & pawns:
+            key ^= RANDOM64[772 + (pos.ep & 7)]
+    if pos.white:
+        key ^= RANDOM64[780]
+    return key
+
+def decode_move(pos, code):
+    """Coup Polyglot (16 bits) -> (coup, promotion) ; le roque est codé roi vers tour"""
+    t, s = code & 63 ^ 56, (code >> 6) & 63 ^ 56
+    promo = PROMOTIONS[(code >> 12) & 7].strip() or None
+    if pos.squares[s] in 'Kk' and s in (4, 60) and t in (s-4, s+3):
+        t = s+2 if t > s else s-2
+    if promo:
+        promo = promo.upper() if pos.white else promo
+    return (RC[s], RC[t]), promo
+
+def encode_move(pos, move, promo=None):
+    (r1,c1),(r2,c2) = move
+    s, t = r1*8+c1, r2*8+c2
+    if pos.squares[s] in 'Kk' and abs(t-s) == 2:
+        t = s+3 if t > s else s-4
+    code = (s ^ 56) << 6 | (t ^ 56)
+    if promo:
+        code |= PROMOTIONS.index(promo.lower()) << 12
+    return code
+
+
+class PolyglotBook:
+    """Livre ouvert en lecture par mmap ; seules les pages touchées par la dichotomie sont lues"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.n = os.fstat(self.file.fileno()).st_size // ENTRY.size
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.n else b''
+
+    def _lower_bound(self, key):
+        lo, hi = 0, self.n
+        mm, unpack = self.mm, KEY.unpack_from
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if unpack(mm, mid * ENTRY.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def entries(self, key):
+        """[(move, weight, learn)] de la clé, dans l'ordre du fichier"""
+        found = []
+        i = self._lower_bound(key)
+        while i < self.n:
+            k, move, weight, learn = ENTRY.unpack_from(self.mm, i * ENTRY.size)
+            if k != key:
+                break
+            found.append((move, weight, learn))
+            i += 1
+        return found
+
+    def moves(self, pos):
+        """[(coup, promotion, poids)] légaux dans pos"""
+        legal = pos.legal_moves()
+        result = []
+        for code, weight, _ in self.entries(polyglot_key(pos)):
+            move, promo = decode_move(pos, code)
+            if move in legal:
+                result.append((move, promo, weight))
+        return result
+
+    def choose(self, pos, rng=random):
+        """Tirage pondéré par les poids du livre : (coup, promotion) ou None hors livre"""
+        moves = [m for m in self.moves(pos) if m[2] > 0]
+        if not moves:
+            return None
+        move, promo, _ = rng.choices(moves, weights=[m[2] for m in moves])[0]
+        return move, promo
+
+    def close(self):
+        if self.n:
+            self.mm.close()
+        self.file.close()
+
+
+def build_book(pgn_paths, out_path, plies=16, min_count=1):
+    """Livre des plies premiers demi-coups des parties ; chaque coup pèse 3 si le camp qui le joue a gagné,
+    2 sur une nulle, 1 sur une défaite"""
+    weights = {}
+    games = 0
+    for path in pgn_paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for headers, sans, result in read_games(f):
+                pos = start_position(headers)
+                games += 1
+                for san in sans[:plies]:
+                    try:
+                        move, promo = parse_san(pos, san)
+                    except ValueError:
+                        break
+                    won = result == ('1-0' if pos.white else '0-1')
+                    k = (polyglot_key(pos), encode_move(pos, move, promo))
+                    weights[k] = weights.get(k, 0) + (3 if won else 2 if result == '1/2-1/2' else 1)
+                    pos.make_move(move, promo)
+    entries = sorted((k, m, w) for (k, m), w in weights.items() if w >= min_count)
+    top = max((w for _, _, w in entries), default=1)
+    scale = 65535 / top if top > 65535 else 1
+    with open(out_path, 'wb') as f:
+        for k, m, w in entries:
+            f.write(ENTRY.pack(k, m, max(1, int(w * scale)), 0))
+    return games, len(entries)
+
+def _bench(book, n=100000):
+    keys = [KEY.unpack_from(book.mm, random.randrange(book.n) * ENTRY.size)[0] for _ in range(n // 2)]
+    keys += [random.getrandbits(64) for _ in range(n - len(keys))]
+    t0 = time.perf_counter()
+    for k in keys:
+        book.entries(k)
+    dt = time.perf_counter() - t0
+    print(f"{book.n} entrées ({book.n * ENTRY.size / 2**20:.1f} Mo) : {dt / n * 1e6:.1f} µs par recherche ({n} recherches)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Livre d'ouvertures Polyglot")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    b = sub.add_parser('build', help="construire un livre à partir de fichiers PGN")
+    b.add_argument('pgn', nargs='+')
+    b.add_argument('-o', '--out', default=BOOK_FILE)
+    b.add_argument('--plies', type=int, default=16)
+    b.add_argument('--min-count', type=int, default=1)
+    p = sub.add_parser('probe', help="coups du livre pour une position")
+    p.add_argument('book')
+    p.add_argument('--fen', default=START_FEN)
+    t = sub.add_parser('bench', help="temps d'une recherche dans le livre")
+    t.add_argument('book')
+    t.add_argument('-n', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'build':
+        games, n = build_book(args.pgn, args.out, args.plies, args.min_count)
+        print(f"{games} parties, {n} entrées écrites dans {args.out}")
+        return 0
+    book = PolyglotBook(args.book)
+    try:
+        if args.cmd == 'probe':
+            board, white, can_castle, en_passant, _, _ = parse_fen(args.fen)
+            pos = Position.from_board(board, white, can_castle, en_passant)
+            print(f"clé {polyglot_key(pos):016x}")
+            moves = book.moves(pos)
+            total = sum(w for _, _, w in moves) or 1
+            for move, promo, weight in sorted(moves, key=lambda m: -m[2]):
+                print(f"  {move_to_uci(move, promo):<6} {weight:>6}  {weight/total:.0%}")
+        else:
+            _bench(book, args.n)
+    finally:
+        book.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+PIECE_VALUES = {'P':100,'N':320,'B':330,'R':500,'Q':900,'K':10000}
+
+# piece-square tables from white's point of view, rank 8 first: index r*8+c like board[r][c]
+PAWN_MG = [
+     0,  0,  0,  0,  0,  0,  0,  0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+     5,  5, 10, 25, 25, 10,  5,  5,
+     0,  0,  0, 20, 20,  0,  0,  0,
+     5, -5,-10,  0,  0,-10, -5,  5,
+     5, 10, 10,-20,-20, 10, 10,  5,
+     0,  0,  0,  0,  0,  0,  0,  0]
+PAWN_EG = [
+     0,  0,  0,  0,  0,  0,  0,  0,
+    80, 80, 80, 80, 80, 80, 80, 80,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    30, 30, 30, 30, 30, 30, 30, 30,
+    15, 15, 15, 15, 15, 15, 15, 15,
+     5,  5,  5,  5,  5,  5,  5,  5,
+     0,  0,  0,  0,  0,  0,  0,  0,
+     0,  0,  0,  0,  0,  0,  0,  0]
+KNIGHT = [
+   -50,-40,-30,-30,-30,-30,-40,-50,
+   -40,-20,  0,  0,  0,  0,-20,-40,
+   -30,  0, 10, 15, 15, 10,  0,-30,
+   -30,  5, 15, 20, 20, 15,  5,-30,
+   -30,  0, 15, 20, 20, 15,  0,-30,
+   -30,  5, 10, 15, 15, 10,  5,-30,
+   -40,-20,  0,  5,  5,  0,-20,-40,
+   -50,-40,-30,-30,-30,-30,-40,-50]
+BISHOP = [
+   -20,-10,-10,-10,-10,-10,-10,-20,
+   -10,  0,  0,  0,  0,  0,  0,-10,
+   -10,  0,  5, 10, 10,  5,  0,-10,
+   -10,  5,  5, 10, 10,  5,  5,-10,
+   -10,  0, 10, 10, 10, 10,  0,-10,
+   -10, 10, 10, 10, 10, 10, 10,-10,
+   -10,  5,  0,  0,  0,  0,  5,-10,
+   -20,-10,-10,-10,-10,-10,-10,-20]
+ROOK = [
+     0,  0,  0,  0,  0,  0,  0,  0,
+     5, 10, 10, 10, 10, 10, 10,  5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+     0,  0,  0,  5,  5,  0,  0,  0]
+QUEEN = [
+   -20,-10,-10, -5, -5,-10,-10,-20,
+   -10,  0,  0,  0,  0,  0,  0,-10,
+   -10,  0,  5,  5,  5,  5,  0,-10,
+    -5,  0,  5,  5,  5,  5,  0, -5,
+     0,  0,  5,  5,  5,  5,  0, -5,
+   -10,  5,  5,  5,  5,  5,  0,-10,
+   -10,  0,  5,  0,  0,  0,  0,-10,
+   -20,-10,-10, -5, -5,-10,-10,-20]
+KING_MG = [
+   -30,-40,-40,-50,-50,-40,-40,-30,
+   -30,-40,-40,-50,-50,-40,-40,-30,
+   -30,-40,-40,-50,-50,-40,-40,-30,
+   -30,-40,-40,-50,-50,-40,-40,-30,
+   -20,-30,-30,-40,-40,-30,-30,-20,
+   -10,-20,-20,-20,-20,-20,-20,-10,
+    20, 20,  0,  0,  0,  0, 20, 20,
+    20, 30, 10,  0,  0, 10, 30, 20]
+KING_EG = [
+   -50,-40,-30,-20,-20,-30,-40,-50,
+   -30,-20,-10,  0,  0,-10,-20,-30,
+   -30,-10, 20, 30, 30, 20,-10,-30,
+   -30,-10, 30, 40, 40, 30,-10,-30,
+   -30,-10, 30, 40, 40, 30,-10,-30,
+   -30,-10, 20, 30, 30, 20,-10,-30,
+   -30,-30,  0,  0,  0,  0,-30,-30,
+   -50,-30,-30,-30,-30,-30,-30,-50]
+
+_TABLES = {'P': (PAWN_MG, PAWN_EG), 'N': (KNIGHT, KNIGHT), 'B': (BISHOP, BISHOP),
+           'R': (ROOK, ROOK), 'Q': (QUEEN, QUEEN), 'K': (KING_MG, KING_EG)}
+
+PHASE_WEIGHT = {'P':0,'N':1,'B':1,'R':2,'Q':4,'K':0,'p':0,'n':1,'b':1,'r':2,'q':4,'k':0}
+MAX_PHASE = 24
+
+# MG_TABLE[piece][s] / EG_TABLE[piece][s]: signed contribution (material + table) of a piece on s,
+# black uses the vertically mirrored square (s ^ 56) and a negative sign
+MG_TABLE = {}
+EG_TABLE = {}
+for _P, (_mg, _eg) in _TABLES.items():
+    _val = PIECE_VALUES[_P] if _P != 'K' else 0
+    MG_TABLE[_P] = [_val + _mg[s] for s in range(64)]
+    EG_TABLE[_P] = [_val + _eg[s] for s in range(64)]
+    MG_TABLE[_P.lower()] = [-(_val + _mg[s ^ 56]) for s in range(64)]
+    EG_TABLE[_P.lower()] = [-(_val + _eg[s ^ 56]) for s in range(64)]
+
+# set to True to compare every incremental score against a full recomputation
+DEBUG_EVAL = False
+
+def taper(mg, eg, phase):
+    if phase > MAX_PHASE: phase = MAX_PHASE
+    return (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
+
+def full_terms(pos):
+    """Recalcule (mg, eg, phase) en parcourant les 64 cases"""
+    mg = eg = phase = 0
+    for s, p in enumerate(pos.squares):
+        if p == '.': continue
+        mg += MG_TABLE[p][s]
+        eg += EG_TABLE[p][s]
+        phase += PHASE_WEIGHT[p]
+    return mg, eg, phase
+
+def check_eval(pos):
+    terms = full_terms(pos)
+    if terms != (pos.mg, pos.eg, pos.phase):
+        raise AssertionError(f"évaluation incrémentale {(pos.mg, pos.eg, pos.phase)} != recalcul {terms}")
+
+def evaluate(pos):
+    """Score du point de vue des Blancs, en O(1) grâce aux termes tenus à jour par make_move/unmake_move"""
+    if DEBUG_EVAL:
+        check_eval(pos)
+    return taper(pos.mg, pos.eg, pos.phase)
@@ -0,0 +1,73 @@
+"""Faux moteur UCI qui remplace Stockfish pour les essais : protocole minimal, joue le premier coup légal
+(ou la première promotion avec --promote).
+
+    python engine/fake_uci.py [--startup 0.3] [--think 0] [--promote n] [--log commandes.txt]
+"""
+import argparse, os, sys, time
+
+if __package__ in (None, ''):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.bitboard import Position
+from engine.board import move_to_uci, uci_to_move
+from engine.fen import parse_fen, START_FEN
+
+COMMAND = [sys.executable, os.path.abspath(__file__)]
+
+def parse_position(args):
+    """'startpos moves e2e4 ...' ou 'fen <6 champs> moves ...' -> Position"""
+    if args and args[0] == 'startpos':
+        fen, rest = START_FEN, args[1:]
+    else:
+        fen, rest = " ".join(args[1:7]), args[7:]
+    board, white, can_castle, en_passant, _, _ = parse_fen(fen)
+    pos = Position.from_board(board, white, can_castle, en_passant)
+    if rest and rest[0] == 'moves':
+        for s in rest[1:]:
+            move, promo = uci_to_move(s)
+            pos.make_move(move, promo)
+    return pos
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--startup', type=float, default=0.0, help="délai simulé au lancement (s)")
+    parser.add_argument('--think', type=float, default=0.0, help="temps de réflexion simulé (s), borné par movetime")
+    parser.add_argument('--promote', choices='qrbn', help="joue une promotion en cette pièce dès qu'il y en a une")
+    parser.add_argument('--log', help="fichier où ajouter chaque commande reçue")
+    args = parser.parse_args(argv)
+    time.sleep(args.startup)
+    pos = Position.from_board(parse_fen(START_FEN)[0])
+    out = sys.stdout
+    log = open(args.log, 'a', encoding='utf-8') if args.log else None
+    for line in sys.stdin:
+        words = line.split()
+        if not words:
+            continue
+        if log:
+            log.write(line.strip() + "\n")
+            log.flush()
+        cmd = words[0]
+        if cmd == 'uci':
+            out.write("id name fake_uci\nid author chess.bite\nuciok\n")
+        elif cmd == 'isready':
+            out.write("readyok\n")
+        elif cmd == 'position':
+            pos = parse_position(words[1:])
+        elif cmd == 'go':
+            think = args.think
+            if 'movetime' in words:
+                think = min(think, int(words[words.index('movetime')+1]) / 1000)
+            time.sleep(think)
+            moves = pos.legal_moves()
+            promotions = [m for m in moves if m[1][0] in (0, 7) and pos.squares[m[0][0]*8 + m[0][1]] in 'Pp'] if args.promote else []
+            if promotions:
+                best = move_to_uci(promotions[0], args.promote)
+            else:
+                best = move_to_uci(moves[0]) if moves else '(none)'
+            out.write(f"bestmove {best}\n")
+        elif cmd == 'quit':
+            break
+        out.flush()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+from .board import idx_to_alg, alg_to_idx
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+def board_to_fen(board, white_to_move, can_castle, en_passant, halfmove=0, fullmove=1):
+    rows=[]
+    for r in range(8):
+        empty=0; rowstr=""
+        for c in range(8):
+            p=board[r][c]
+            if p=='.':
+                empty+=1
+            else:
+                if empty>0:
+                    rowstr += str(empty); empty=0
+                rowstr += p
+        if empty>0: rowstr += str(empty)
+        rows.append(rowstr)
+    fen_board = "/".join(rows)
+    fen_side = 'w' if white_to_move else 'b'
+    rights = ''
+    if can_castle.get('K', False): rights += 'K'
+    if can_castle.get('Q', False): rights += 'Q'
+    if can_castle.get('k', False): rights += 'k'
+    if can_castle.get('q', False): rights += 'q'
+    if rights=='' : rights = '-'
+    if en_passant:
+        ep = idx_to_alg(*en_passant)
+    else:
+        ep = '-'
+    return f"{fen_board} {fen_side} {rights} {ep} {halfmove} {fullmove}"
+
+def parse_fen(fen):
+    """Retourne (board, white_to_move, can_castle, en_passant, halfmove, fullmove)"""
+    parts = fen.split()
+    if len(parts) < 4:
+        raise ValueError("FEN invalide")
+    rows = parts[0].split('/')
+    if len(rows) != 8:
+        raise ValueError("FEN invalide")
+    board = []
+    for row in rows:
+        line = []
+        for ch in row:
+            if ch.isdigit():
+                line.extend('.' * int(ch))
+            elif ch in "PNBRQKpnbrqk":
+                line.append(ch)
+            else:
+                raise ValueError("FEN invalide")
+        if len(line) != 8:
+            raise ValueError("FEN invalide")
+        board.append(line)
+    white = parts[1] == 'w'
+    can_castle = {k: k in parts[2] for k in 'KQkq'}
+    en_passant = None if parts[3] == '-' else alg_to_idx(parts[3])
+    halfmove = int(parts[4]) if len(parts) > 4 else 0
+    fullmove = int(parts[5]) if len(parts) > 5 else 1
+    return board, white, can_castle, en_passant, halfmove, fullmove
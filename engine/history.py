@@ -0,0 +1,138 @@
+"""Historique annulable d'une partie : un enregistrement par coup (les cases qu'il modifie et ce qu'il efface :
+pièce prise, droits de roque, prise en passant, pendule du joueur), au lieu d'une copie du plateau.
+Annuler et rétablir coûtent O(1) ; aller à un demi-coup quelconque enchaîne les deux."""
+from .board import move_to_uci
+from .pile_liste import Liste_chaine, Pile_LIFO
+
+def _record(state, move, promo, dt):
+    """Enregistrement (coup, promotion, pièce jouée, pièce prise, case de la prise, tour du roque,
+    droits de roque, case en passant, pendule avant le coup, secondes) de move joué dans state"""
+    (r1,c1),(r2,c2) = move
+    board = state.board
+    piece, captured, cap_sq = board[r1][c1], board[r2][c2], (r2, c2)
+    if piece in 'Pp' and c1 != c2 and captured == '.':
+        cap_sq = (r1, c2)   # en passant: the pawn taken stands beside the one that takes
+        captured = board[r1][c2]
+    rook = None
+    if piece in 'Kk' and abs(c2-c1) == 2:
+        rook = ((r2, 7), (r2, 5)) if c2 > c1 else ((r2, 0), (r2, 3))
+    player = 'W' if piece.isupper() else 'B'
+    # can_castle is not copied: GameState.apply_move replaces it with a new dictionary
+    return (move, promo, piece, captured, cap_sq, rook, state.can_castle, state.en_passant,
+            state.remaining_time[player], dt)
+
+def _entry(record):
+    """Entrée de GameState.move_history correspondant à un enregistrement"""
+    move, promo, piece, dt = record[0], record[1], record[2], record[9]
+    return {'move': move, 'algebraic': move_to_uci(move, promo), 'time': dt, 'player': 'W' if piece.isupper() else 'B'}
+
+
+class GameHistory:
+    """Coups joués (liste chaînée, le dernier en queue) et coups annulés (pile, le prochain à rétablir au sommet).
+    Toutes les méthodes tiennent à jour le GameState donné : plateau, trait, roques, prise en passant,
+    pendules, move_history et historique des répétitions, ainsi que le journal (GameJournal) s'il y en a un.
+    Pour une partie chargée d'un journal, les base premiers coups n'ont pas encore d'enregistrement :
+    ils sont rejoués depuis le journal, un point de reprise à la fois, quand on les annule."""
+
+    def __init__(self, journal=None):
+        self.done = Liste_chaine()
+        self.undone = Pile_LIFO()
+        self.journal = journal
+        self.loaded = None   # journal the first base moves come from
+        self.base = 0
+
+    @classmethod
+    def from_journal(cls, journal):
+        """(GameState à la fin du journal, son historique), sans rejouer toute la partie"""
+        history = cls(journal)
+        history.loaded, history.base = journal, len(journal.moves)
+        return journal.state_at(), history
+
+    @property
+    def ply(self):
+        return self.base + len(self.done)
+
+    def __len__(self):
+        """Demi-coups connus, coups annulés compris"""
+        return self.ply + len(self.undone)
+
+    def can_undo(self):
+        return self.ply > 0
+
+    def _load_block(self, state):
+        """Enregistrements des coups depuis le point de reprise précédant base, rejoués depuis le journal chargé ;
+        state (au demi-coup base) reprend l'historique des répétitions de ce rejeu, qui remonte plus loin"""
+        end = self.base
+        start = max((p for p in self.loaded.checkpoints if p < end), default=0)
+        replay = self.loaded.state_at(start)
+        for move, promo, dt in self.loaded.moves[start:end]:
+            record = _record(replay, move, promo, dt)
+            replay.apply_move(move, promo)
+            replay.spend_time('W' if record[2].isupper() else 'B', dt)
+            self.done.append(record)
+        state.keys, state.halfmoves = replay.keys, replay.halfmoves
+        self.base = start
+
+    def can_redo(self):
+        return not self.undone.is_empty()
+
+    def _apply(self, state, record):
+        move, promo, piece, dt = record[0], record[1], record[2], record[9]
+        state.apply_move(move, promo)
+        state.spend_time('W' if piece.isupper() else 'B', dt)
+        entry = _entry(record)
+        state.move_history.append(entry)
+        self.done.append(record)
+        if self.journal is not None:
+            self.journal.record_move(state, move, promo, dt)
+        return entry
+
+    def play(self, state, move, promo=None, dt=0.0):
+        """Joue move dans state (dt secondes de réflexion) ; les coups annulés ne peuvent plus être rétablis.
+        Retourne l'entrée ajoutée à move_history."""
+        self.undone.clear()
+        return self._apply(state, _record(state, move, promo, dt))
+
+    def undo(self, state):
+        """Annule le dernier coup ; retourne son enregistrement, None s'il n'y en a pas"""
+        if not self.done and self.base:
+            self._load_block(state)
+        record = self.done.pop()
+        if record is None:
+            return None
+        ((r1,c1),(r2,c2)), _, piece, captured, (rc, cc), rook, can_castle, en_passant, clock, _ = record
+        board = [row[:] for row in state.board]   # the previous board may still be read (search, display)
+        board[r1][c1] = piece
+        board[r2][c2] = '.'
+        if captured != '.':
+            board[rc][cc] = captured
+        if rook:
+            (rr, rc1), (_, rc2) = rook
+            board[rr][rc1], board[rr][rc2] = board[rr][rc2], '.'
+        state.board = board
+        state.can_castle, state.en_passant = can_castle, en_passant
+        state.white_to_move = not state.white_to_move
+        state.remaining_time['W' if piece.isupper() else 'B'] = clock
+        if state.move_history:
+            state.move_history.pop()
+        state.pop_position()
+        state.position_changed()
+        self.undone.push(record)
+        if self.journal is not None:
+            self.journal.record_undo()
+        return record
+
+    def redo(self, state):
+        """Rejoue le dernier coup annulé (même durée de réflexion) ; retourne son entrée de move_history"""
+        record = self.undone.pop()
+        if record is None:
+            return None
+        return self._apply(state, record)
+
+    def go_to(self, state, ply):
+        """Amène state au demi-coup ply (0 : position de départ) en annulant ou rétablissant les coups"""
+        ply = max(0, min(ply, len(self)))
+        while self.ply > ply:
+            self.undo(state)
+        while self.ply < ply:
+            self.redo(state)
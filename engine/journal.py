@@ -0,0 +1,249 @@
+"""Journal binaire des parties (.cbj) : un en-tête (réglages, position de départ), puis des enregistrements de
+taille fixe ajoutés en fin de fichier et vidés sur disque à chaque coup ou annulation. Un point de reprise
+(position complète) tous les CHECKPOINT_EVERY demi-coups borne le nombre de coups à rejouer au chargement.
+
+    python -m engine.journal partie.cbj        # résumé d'un journal et durée de son chargement
+
+Les anciennes sauvegardes JSON (save/*.json) restent lisibles par l'interface.
+"""
+import os, struct, sys, time
+from .board import move_to_uci, uci_to_move
+from .fen import parse_fen, board_to_fen
+from .movegen import make_move
+from .timecontrol import GameState
+
+MAGIC = b'CBJ2'
+HEADER = struct.Struct('<4s?ddd')            # magic, vs_ai, total time (0: none), W and B clocks at the start
+LENGTH = struct.Struct('<H')                 # prefix of the two strings that follow: AI level, start FEN
+RECORD = struct.Struct('<Hf')                # move code (or UNDO / CHECKPOINT), seconds spent on the move
+CHECKPOINT_BODY = struct.Struct('<64sBBHddQH')   # board, side + castling bits, en-passant square, ply, W and B clocks,
+                                                  # Zobrist key, halfmove clock
+CHECKPOINT_SIZE = -(-CHECKPOINT_BODY.size // RECORD.size) * RECORD.size   # padded to whole records
+UNDO, CHECKPOINT = 0xFFFF, 0xFFFE
+CHECKPOINT_EVERY = 16
+PROMOTIONS = " NBRQ"
+CASTLE_BITS = (('K', 1), ('Q', 2), ('k', 4), ('q', 8))
+NO_SQUARE = 255
+
+def encode_move(move, promo=None):
+    (r1,c1),(r2,c2) = move
+    return (r1*8+c1) << 9 | (r2*8+c2) << 3 | PROMOTIONS.index(promo.upper() if promo else ' ')
+
+def decode_move(code, white):
+    s, t, p = code >> 9, (code >> 3) & 63, code & 7
+    promo = PROMOTIONS[p] if p else None
+    if promo and not white:
+        promo = promo.lower()
+    return ((s >> 3, s & 7), (t >> 3, t & 7)), promo
+
+def is_journal(path):
+    with open(path, 'rb') as f:
+        return f.read(4) == MAGIC
+
+def _checkpoint(state, ply):
+    castle = sum(bit for k, bit in CASTLE_BITS if state.can_castle.get(k))
+    ep = state.en_passant[0]*8 + state.en_passant[1] if state.en_passant else NO_SQUARE
+    board = ''.join(''.join(row) for row in state.board).encode('ascii')
+    return (board, int(state.white_to_move) | castle << 1, ep, ply,
+            state.remaining_time['W'], state.remaining_time['B'], state.keys[-1], state.halfmove)
+
+def _history(moves, first_white):
+    """move_history de GameState à partir de la pile de coups"""
+    history = []
+    white = first_white
+    for move, promo, dt in moves:
+        history.append({'move': move, 'algebraic': move_to_uci(move, promo), 'time': dt, 'player': 'W' if white else 'B'})
+        white = not white
+    return history
+
+def _replayable(state):
+    """[(coup, promotion, secondes)] qui mènent de state.start_fen à la position courante, None sinon"""
+    board, white, can_castle, en_passant, _, _ = parse_fen(state.start_fen)
+    moves = []
+    try:
+        for h in state.move_history:
+            move, promo = uci_to_move(h['algebraic'])
+            if promo:
+                promo = promo.upper() if white else promo.lower()
+            board, can_castle, en_passant = make_move(board, move, can_castle, en_passant, promo)
+            white = not white
+            moves.append((move, promo, float(h.get('time', 0.0))))
+    except (KeyError, ValueError, IndexError, AttributeError):
+        return None
+    if board != state.board or white != state.white_to_move:
+        return None
+    return moves
+
+
+class GameJournal:
+    """Journal ouvert en ajout. moves est la pile des coups joués (coup, promotion, secondes),
+    checkpoints les points de reprise encore valides, par demi-coup"""
+
+    def __init__(self, path, vs_ai, ai_level, total_time, clocks, start_fen):
+        self.path = path
+        self.vs_ai, self.ai_level, self.total_time = vs_ai, ai_level, total_time
+        self.clocks = clocks
+        self.start_fen = start_fen
+        self.moves = []
+        self.checkpoints = {}
+        self.file = None
+
+    @classmethod
+    def create(cls, path, state, vs_ai=None, ai_level=None):
+        """Nouveau journal contenant déjà la partie de state (ou sa seule position si l'historique
+        ne se rejoue pas depuis state.start_fen)"""
+        moves = _replayable(state)
+        if moves is None:
+            start_fen = board_to_fen(state.board, state.white_to_move, state.can_castle, state.en_passant)
+            clocks = (state.remaining_time['W'], state.remaining_time['B'])
+            moves = []
+        else:
+            start_fen = state.start_fen
+            clocks = (state.start_clocks['W'], state.start_clocks['B'])
+        journal = cls(path, state.vs_ai if vs_ai is None else vs_ai, ai_level or state.ai_level,
+                      state.total_time, clocks, start_fen)
+        journal.file = open(path, 'wb')
+        level, fen = journal.ai_level.encode('utf-8'), start_fen.encode('ascii')
+        journal.file.write(HEADER.pack(MAGIC, bool(journal.vs_ai), float(state.total_time or 0.0), *clocks)
+                           + LENGTH.pack(len(level)) + level + LENGTH.pack(len(fen)) + fen)
+        replay = journal.start_state()
+        for move, promo, dt in moves:
+            replay.spend_time('W' if replay.white_to_move else 'B', dt)
+            replay.apply_move(move, promo)
+            journal.record_move(replay, move, promo, dt, sync=False)
+        journal._sync()
+        return journal
+
+    @classmethod
+    def open(cls, path, append=True):
+        """Journal existant, relu puis rouvert en ajout (append=False : lecture seule, le fichier n'est pas touché) ;
+        un enregistrement tronqué par un arrêt brutal est ignoré, et retiré du fichier à la réouverture en ajout"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, vs_ai, total_time, w, b = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} n'est pas un journal de partie")
+        offset = HEADER.size
+        strings = []
+        for _ in range(2):
+            n, = LENGTH.unpack_from(data, offset)
+            strings.append(data[offset + LENGTH.size: offset + LENGTH.size + n].decode('utf-8'))
+            offset += LENGTH.size + n
+        journal = cls(path, vs_ai, strings[0], total_time or None, (w, b), strings[1])
+        first_white = parse_fen(journal.start_fen)[1]
+        moves, checkpoints = journal.moves, journal.checkpoints
+        end = len(data)
+        while offset + RECORD.size <= end:
+            code, dt = RECORD.unpack_from(data, offset)
+            if code == CHECKPOINT:
+                if offset + RECORD.size + CHECKPOINT_SIZE > end:
+                    break
+                body = CHECKPOINT_BODY.unpack_from(data, offset + RECORD.size)
+                checkpoints[body[3]] = body
+                offset += RECORD.size + CHECKPOINT_SIZE
+                continue
+            if code == UNDO:
+                if moves:
+                    moves.pop()
+                    checkpoints.pop(len(moves) + 1, None)
+            else:
+                moves.append(decode_move(code, first_white == (len(moves) % 2 == 0)) + (dt,))
+            offset += RECORD.size
+        if append:
+            journal.file = open(path, 'r+b')
+            journal.file.truncate(offset)
+            journal.file.seek(offset)
+        return journal
+
+    def start_state(self):
+        """GameState à la position de départ du journal, pendules comprises"""
+        state = GameState(vs_ai=self.vs_ai, ai_level=self.ai_level, total_time=self.total_time)
+        state.set_fen(self.start_fen)
+        state.remaining_time = {'W': self.clocks[0], 'B': self.clocks[1]}
+        state.start_clocks = dict(state.remaining_time)
+        return state
+
+    def state_at(self, ply=None, history=True):
+        """GameState après ply demi-coups (tous par défaut) : dernier point de reprise, puis au plus
+        CHECKPOINT_EVERY - 1 coups rejoués. Avec history, l'historique des répétitions remonte jusqu'au
+        dernier coup irréversible (repris alors d'un point de reprise plus ancien)"""
+        if ply is None:
+            ply = len(self.moves)
+        base = self._base(ply)
+        state = self._replay(base, ply)
+        if history:
+            first = ply - state.halfmove
+            if first < base:
+                state = self._replay(self._base(first), ply)
+            state.move_history = _history(self.moves[:ply], parse_fen(self.start_fen)[1])
+        return state
+
+    def _base(self, ply):
+        """Dernier point de reprise au plus tard au demi-coup ply (0 : position de départ)"""
+        return max((p for p in self.checkpoints if p <= ply), default=0)
+
+    def _replay(self, base, ply):
+        """GameState au point de reprise base, puis les coups jusqu'à ply rejoués"""
+        state = self.start_state()
+        if base:
+            board, flags, ep, _, w, b, key, halfmove = self.checkpoints[base]
+            text = board.decode('ascii')
+            state.board = [list(text[r*8:r*8+8]) for r in range(8)]
+            state.white_to_move = bool(flags & 1)
+            state.can_castle = {k: bool(flags >> 1 & bit) for k, bit in CASTLE_BITS}
+            state.en_passant = None if ep == NO_SQUARE else (ep >> 3, ep & 7)
+            state.remaining_time = {'W': w, 'B': b}
+            state.keys, state.halfmoves = [key], [halfmove]
+        for move, promo, dt in self.moves[base:ply]:
+            state.spend_time('W' if state.white_to_move else 'B', dt)
+            state.apply_move(move, promo)
+        return state
+
+    def record_move(self, state, move, promo, dt, sync=True):
+        """Coup joué (state est la position d'après) ; point de reprise tous les CHECKPOINT_EVERY demi-coups"""
+        self.moves.append((move, promo, dt))
+        self.file.write(RECORD.pack(encode_move(move, promo), dt))
+        ply = len(self.moves)
+        if ply % CHECKPOINT_EVERY == 0:
+            body = _checkpoint(state, ply)
+            self.checkpoints[ply] = body
+            self.file.write(RECORD.pack(CHECKPOINT, 0.0) + CHECKPOINT_BODY.pack(*body).ljust(CHECKPOINT_SIZE, b'\0'))
+        if sync:
+            self._sync()
+
+    def record_undo(self):
+        if not self.moves:
+            return
+        self.moves.pop()
+        self.checkpoints.pop(len(self.moves) + 1, None)
+        self.file.write(RECORD.pack(UNDO, 0.0))
+        self._sync()
+
+    def _sync(self):
+        # a crash loses at most the move being written
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage : python -m engine.journal partie.cbj")
+        return 2
+    t0 = time.perf_counter()
+    journal = GameJournal.open(argv[0], append=False)
+    state = journal.state_at()
+    dt = time.perf_counter() - t0
+    journal.close()
+    print(f"{len(journal.moves)} demi-coups, {len(journal.checkpoints)} points de reprise, "
+          f"niveau {journal.ai_level if journal.vs_ai else '-'}, chargé en {dt * 1000:.1f} ms")
+    print(board_to_fen(state.board, state.white_to_move, state.can_castle, state.en_passant))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""Matchs entre niveaux de l'IA, sans interface : les parties sont jouées en parallèle dans un pool de processus
+et arbitrées avec GameState (statut de engine.movegen), pendules comprises.
+
+    python -m engine.match Complexe Normal --games 20 --time 60
+    python -m engine.match "Complexe:depth=3" "Complexe:depth=4,book=0" --processes 4 --pgn match.pgn
+    python -m engine.match Complexe Impossible --openings ouvertures.pgn --opening-plies 8
+
+Un joueur est un nom de AI_BY_NAME, éventuellement suivi d'options : depth et hash (Mo) pour Complexe et
+Impossible, book=0 pour se passer du livre d'ouvertures. Chaque ouverture est jouée deux fois, couleurs inversées.
+"""
+import argparse, math, multiprocessing, sys, time
+from .ai import AI_BY_NAME, TT_SIZE_MB, ai_normal, ai_complex, stockfish_bestmove, with_book
+from .bitboard import Position
+from .board import move_to_uci, uci_to_move
+from .pgn import read_games, parse_san, move_to_san, write_game, start_position
+from .search import MAX_DEPTH
+from .timecontrol import GameState
+from .tt import TranspositionTable
+
+# (FEN or None for the initial position, UCI moves)
+OPENINGS = [(None, moves.split()) for moves in (
+    "e2e4 e7e5 g1f3 b8c6", "e2e4 c7c5 g1f3 d7d6", "e2e4 e7e6 d2d4 d7d5", "e2e4 c7c6 d2d4 d7d5",
+    "d2d4 d7d5 c2c4 e7e6", "d2d4 g8f6 c2c4 g7g6", "d2d4 g8f6 c2c4 e7e6", "c2c4 e7e5 b1c3 g8f6",
+    "g1f3 d7d5 g2g3 g8f6", "e2e4 d7d5 e4d5 d8d5",
+)]
+SEARCH_LEVELS = {'Complexe': 4, 'Impossible': MAX_DEPTH}   # default depth
+NO_BOOK = {'Normal': ai_normal}
+MAX_PLIES = 300
+
+def make_player(spec):
+    """'Complexe', 'Complexe:depth=3,book=0,hash=32'... -> fonction(game_state) ;
+    chaque joueur qui cherche a sa propre table de transposition"""
+    name, _, options = spec.partition(':')
+    if name not in AI_BY_NAME:
+        raise ValueError(f"niveau inconnu : {name} (niveaux : {', '.join(AI_BY_NAME)})")
+    opts = dict(item.partition('=')[::2] for item in options.split(',') if item)
+    book = opts.pop('book', '1') != '0'
+    if name in SEARCH_LEVELS:
+        depth = int(opts.pop('depth', SEARCH_LEVELS[name]))
+        tt = TranspositionTable(float(opts.pop('hash', TT_SIZE_MB)))
+        def ai(game_state):
+            if name == 'Impossible':
+                best = stockfish_bestmove(game_state)
+                if best:
+                    move, game_state['promotion'] = best
+                    return move
+            return ai_complex(game_state, depth, tt)
+        if book:
+            ai = with_book(ai)
+    else:
+        ai = AI_BY_NAME[name] if book else NO_BOOK.get(name, AI_BY_NAME[name])
+    if opts:
+        raise ValueError(f"option inconnue pour {name} : {', '.join(opts)}")
+    return ai
+
+def load_openings(path, plies=8):
+    """Ouvertures d'un fichier PGN (plies premiers demi-coups de chaque partie) ou texte
+    (une ligne par ouverture : FEN, ou coups UCI depuis la position initiale)"""
+    openings = []
+    with open(path, encoding='utf-8', errors='replace') as f:
+        if path.lower().endswith('.pgn'):
+            for headers, sans, _ in read_games(f):
+                pos = start_position(headers)
+                moves = []
+                try:
+                    for san in sans[:plies]:
+                        move, promo = parse_san(pos, san)
+                        moves.append(move_to_uci(move, promo))
+                        pos.make_move(move, promo)
+                except ValueError:
+                    continue
+                openings.append((headers.get('FEN'), moves))
+        else:
+            for line in f:
+                line = line.split('#')[0].strip()
+                if line:
+                    openings.append((line, []) if '/' in line else (None, line.split()))
+    if not openings:
+        raise ValueError(f"aucune ouverture dans {path}")
+    return openings
+
+def insufficient_material(pos):
+    """Rois seuls, ou un seul fou ou cavalier en plus"""
+    if any(pos.bb[p] for p in 'PpRrQq'):
+        return False
+    minors = sum(bin(pos.bb[p]).count('1') for p in 'NnBb')
+    return minors <= 1
+
+def play_game(job):
+    """Joue une partie ; job = (numéro, (blancs, noirs), places ('A', 'B') ou ('B', 'A'), ouverture,
+    temps par joueur ou None, demi-coups max)"""
+    index, specs, seats, (fen, opening), total_time, max_plies = job
+    players = [make_player(spec) for spec in specs]
+    state = GameState(vs_ai=True, total_time=total_time)
+    if fen:
+        state.set_fen(fen)
+    pos = Position.from_board(state.board, state.white_to_move, state.can_castle, state.en_passant)
+    first_white = pos.white
+    sans = []
+    stats = [{'moves': 0, 'time': 0.0, 'nodes': 0, 'searched': 0.0} for _ in players]
+    result = reason = None
+
+    def play(move, promo, dt, player):
+        sans.append(move_to_san(pos, move, promo))
+        pos.make_move(move, promo)
+        state.apply_move(move, promo)
+        state.move_history.append({'move': move, 'algebraic': move_to_uci(move, promo), 'time': dt, 'player': player})
+
+    for uci in opening:
+        move, promo = uci_to_move(uci)
+        if move not in pos.legal_moves():
+            raise ValueError(f"ouverture illégale : {' '.join(opening)}")
+        if promo:
+            promo = promo.upper() if pos.white else promo.lower()
+        play(move, promo, 0.0, 'W' if pos.white else 'B')
+    book_plies = len(sans)
+
+    while result is None:
+        white = state.white_to_move
+        side = 0 if white else 1
+        status = state.status()
+        if status.checkmate:
+            result, reason = ('0-1' if white else '1-0'), "mat"
+        elif status.stalemate:
+            result, reason = '1/2-1/2', "pat"
+        elif state.draw_reason():
+            result, reason = '1/2-1/2', state.draw_reason()
+        elif insufficient_material(pos):
+            result, reason = '1/2-1/2', "matériel insuffisant"
+        elif len(sans) - book_plies >= max_plies:
+            result, reason = '1/2-1/2', "limite de demi-coups"
+        if result:
+            break
+        game_state = state.ai_state()
+        game_state['stats'] = search = {}
+        state.start_move_timer()
+        t0 = time.perf_counter()
+        move = players[side](game_state)
+        elapsed = time.perf_counter() - t0
+        dt = state.stop_move_timer()
+        st = stats[side]
+        st['moves'] += 1
+        st['time'] += elapsed
+        if search.get('nodes'):
+            st['nodes'] += search['nodes']
+            st['searched'] += elapsed
+        if state.out_of_time():
+            result, reason = ('0-1' if white else '1-0'), "temps dépassé"
+        elif move not in status.moves:
+            result, reason = ('0-1' if white else '1-0'), f"coup illégal ({move})" if move else "aucun coup"
+        else:
+            (r1,c1),(r2,c2) = move
+            promo = None
+            if state.board[r1][c1] in 'Pp' and r2 in (0, 7):
+                promo = game_state.get('promotion') or ('Q' if white else 'q')
+            play(move, promo, dt, 'W' if white else 'B')
+    return {'index': index, 'specs': specs, 'seats': seats, 'fen': fen, 'first_white': first_white, 'sans': sans,
+            'result': result, 'reason': reason, 'stats': stats}
+
+def elo(wins, draws, losses):
+    """(écart Elo, demi-largeur de l'intervalle de confiance à 95 %) du point de vue du premier joueur"""
+    n = wins + draws + losses
+    if not n:
+        return 0.0, math.inf
+    score = (wins + draws / 2) / n
+    variance = (wins * (1 - score)**2 + draws * (0.5 - score)**2 + losses * score**2) / n
+    margin = 1.96 * math.sqrt(variance / n)
+    def to_elo(s):
+        s = min(max(s, 1e-3), 1 - 1e-3)
+        return -400 * math.log10(1 / s - 1)
+    return to_elo(score), (to_elo(score + margin) - to_elo(score - margin)) / 2
+
+def schedule(spec_a, spec_b, games, openings, total_time=None, max_plies=MAX_PLIES):
+    """Parties du match : l'ouverture change toutes les deux parties, les couleurs à chaque partie"""
+    jobs = []
+    for i in range(games):
+        seats = ('A', 'B') if i % 2 == 0 else ('B', 'A')
+        specs = tuple(spec_a if seat == 'A' else spec_b for seat in seats)
+        jobs.append((i, specs, seats, openings[(i // 2) % len(openings)], total_time, max_plies))
+    return jobs
+
+def write_pgn(stream, game, total_time=None):
+    white, black = game['specs']
+    headers = {'Event': "Match chess.bot", 'Site': "engine.match", 'Date': time.strftime('%Y.%m.%d'),
+               'Round': game['index'] + 1, 'White': white, 'Black': black, 'Termination': game['reason']}
+    if total_time:
+        headers['TimeControl'] = f"{total_time:g}"
+    if game['fen']:
+        headers['SetUp'], headers['FEN'] = '1', game['fen']
+    number = int(game['fen'].split()[5]) if game['fen'] and len(game['fen'].split()) > 5 else 1
+    write_game(stream, headers, game['sans'], game['result'], game['first_white'], number)
+
+def run_match(spec_a, spec_b, games, openings=OPENINGS, total_time=None, processes=1, max_plies=MAX_PLIES,
+              on_game=None):
+    """Joue le match et renvoie les parties dans l'ordre ; on_game(partie) est appelé à chaque fin de partie"""
+    for spec in (spec_a, spec_b):
+        make_player(spec)   # bad names and options fail here, not in the pool
+    jobs = schedule(spec_a, spec_b, games, openings, total_time, max_plies)
+    done = []
+    if processes <= 1:
+        results = map(play_game, jobs)
+    else:
+        pool = multiprocessing.get_context('spawn').Pool(processes)
+        results = pool.imap_unordered(play_game, jobs)
+    try:
+        for game in results:
+            done.append(game)
+            if on_game:
+                on_game(game)
+    finally:
+        if processes > 1:
+            pool.terminate()
+            pool.join()
+    return sorted(done, key=lambda g: g['index'])
+
+def points_a(game):
+    """Points du joueur A (premier nommé) dans la partie"""
+    points = {'1-0': 1.0, '0-1': 0.0}.get(game['result'], 0.5)
+    return points if game['seats'][0] == 'A' else 1.0 - points
+
+def summary(games):
+    """(gains, nulles, défaites) du joueur A et statistiques cumulées par place ('A', 'B') : un niveau
+    opposé à lui-même garde deux entrées"""
+    wins = draws = losses = 0
+    per_seat = {}
+    for game in games:
+        points = points_a(game)
+        wins += points == 1.0; draws += points == 0.5; losses += points == 0.0
+        for seat, st in zip(game['seats'], game['stats']):
+            total = per_seat.setdefault(seat, dict.fromkeys(st, 0))
+            for k, v in st.items():
+                total[k] += v
+    return (wins, draws, losses), per_seat
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match sans interface entre deux niveaux de l'IA")
+    parser.add_argument('player_a')
+    parser.add_argument('player_b')
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--processes', type=int, default=max(1, (multiprocessing.cpu_count() or 2) - 1))
+    parser.add_argument('--time', type=float, default=60, help="secondes par joueur et par partie (0 : pas de pendule)")
+    parser.add_argument('--openings', help="fichier PGN, ou une ouverture par ligne (FEN ou coups UCI)")
+    parser.add_argument('--opening-plies', type=int, default=8)
+    parser.add_argument('--max-plies', type=int, default=MAX_PLIES, help="nulle au-delà (hors ouverture)")
+    parser.add_argument('--pgn', default='match.pgn', help="parties jouées ('' : ne pas écrire)")
+    args = parser.parse_args(argv)
+    if args.games < 1:
+        parser.error("--games doit valoir au moins 1")
+
+    try:
+        openings = load_openings(args.openings, args.opening_plies) if args.openings else OPENINGS
+        for spec in (args.player_a, args.player_b):
+            make_player(spec)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    total_time = args.time or None
+    points = [0.0]
+    out = open(args.pgn, 'w', encoding='utf-8') if args.pgn else None
+
+    def on_game(game):
+        white, black = game['specs']
+        points[0] += points_a(game)
+        print(f"partie {game['index'] + 1:>3} : {white} - {black}  {game['result']:<7} ({game['reason']}, "
+              f"{len(game['sans'])} demi-coups)   {args.player_a} {points[0]:g}", flush=True)
+        if out:
+            write_pgn(out, game, total_time)
+            out.flush()
+
+    t0 = time.perf_counter()
+    try:
+        games = run_match(args.player_a, args.player_b, args.games, openings, total_time, args.processes,
+                          args.max_plies, on_game)
+    finally:
+        if out:
+            out.close()
+    (wins, draws, losses), per_seat = summary(games)
+    n = len(games)
+    diff, margin = elo(wins, draws, losses)
+    print(f"\n{args.player_a} - {args.player_b} : +{wins} ={draws} -{losses} sur {n} parties "
+          f"({(wins + draws / 2) / n:.1%}) en {time.perf_counter() - t0:.0f}s")
+    print(f"Écart Elo : {diff:+.0f} ± {margin:.0f} (95 %)")
+    for seat, spec in (('A', args.player_a), ('B', args.player_b)):
+        st = per_seat[seat]
+        per_move = st['time'] / st['moves'] if st['moves'] else 0.0
+        nps = f"{st['nodes'] / st['searched']:.0f} nps" if st['searched'] else "pas de recherche"
+        print(f"  {seat} {spec:<22} {st['moves']:>5} coups  {per_move * 1000:7.1f} ms par coup  {nps}")
+    if out:
+        print(f"Parties écrites dans {args.pgn}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
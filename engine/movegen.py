@@ -1,72 +1,12 @@
 from .board import *
-import copy
+from .bitboard import Position
+from collections import OrderedDict
+import threading
 
-def generate_pseudo_moves(board, r, c, can_castle, en_passant):
-    p = board[r][c]
-    if p=='.': return []
-    moves=[]
-    white = p.isupper()
-    up = -1 if white else 1
-    P = p.upper()
-    if P=='P':
-        if on_board(r+up, c) and board[r+up][c]=='.':
-            moves.append((r+up,c))
-            start = 6 if white else 1
-            if r==start and board[r+2*up][c]=='.':
-                moves.append((r+2*up,c))
-        for dc in (-1,1):
-            nr, nc = r+up, c+dc
-            if on_board(nr,nc) and board[nr][nc]!='.' and not same_color(board[nr][nc], p):
-                moves.append((nr,nc))
-        if en_passant:
-            er, ec = en_passant
-            if r+up==er and abs(ec-c)==1:
-                moves.append((er,ec))
-    elif P=='N':
-        for dr,dc in [(-2,-1),(-2,1),(-1,-2),(-1,2),(1,-2),(1,2),(2,-1),(2,1)]:
-            nr, nc = r+dr, c+dc
-            if on_board(nr,nc) and (board[nr][nc]=='.' or not same_color(board[nr][nc], p)):
-                moves.append((nr,nc))
-    elif P in ('B','R','Q'):
-        dirs=[]
-        if P in ('B','Q'): dirs += [(-1,-1),(-1,1),(1,-1),(1,1)]
-        if P in ('R','Q'): dirs += [(-1,0),(1,0),(0,-1),(0,1)]
-        for dr,dc in dirs:
-            nr,nc = r+dr, c+dc
-            while on_board(nr,nc):
-                if board[nr][nc]=='.':
-                    moves.append((nr,nc))
-                else:
-                    if not same_color(board[nr][nc], p):
-                        moves.append((nr,nc))
-                    break
-                nr += dr; nc += dc
-    elif P=='K':
-        for dr in (-1,0,1):
-            for dc in (-1,0,1):
-                if dr==dc==0: continue
-                nr, nc = r+dr, c+dc
-                if on_board(nr,nc) and (board[nr][nc]=='.' or not same_color(board[nr][nc], p)):
-                    moves.append((nr,nc))
-        # castle squares (we check emptiness only here; legality wrt check is handled later)
-        if white:
-            if can_castle.get('K', False):
-                if board[7][5]=='.' and board[7][6]=='.':
-                    moves.append((7,6))
-            if can_castle.get('Q', False):
-                if board[7][1]=='.' and board[7][2]=='.' and board[7][3]=='.':
-                    moves.append((7,2))
-        else:
-            if can_castle.get('k', False):
-                if board[0][5]=='.' and board[0][6]=='.':
-                    moves.append((0,6))
-            if can_castle.get('q', False):
-                if board[0][1]=='.' and board[0][2]=='.' and board[0][3]=='.':
-                    moves.append((0,2))
-    return moves
+STATUS_CACHE_SIZE = 256   # positions kept by position_status
 
 def make_move(board, move, can_castle, en_passant, promote_to=None):
-    b = copy.deepcopy(board)
+    b = [row[:] for row in board]
     (r1,c1),(r2,c2)=move
     p = b[r1][c1]
     b[r1][c1]='.'
@@ -94,7 +34,7 @@ def make_move(board, move, can_castle, en_passant, promote_to=None):
             b[r2][c2] = 'Q' if p.isupper() else 'q'
     else:
         b[r2][c2]=p
-    new_castle = copy.deepcopy(can_castle)
+    new_castle = dict(can_castle)
     # update castling rights
     if p=='K':
         new_castle['K']=False; new_castle['Q']=False
@@ -113,66 +53,60 @@ def make_move(board, move, can_castle, en_passant, promote_to=None):
         new_ep = ((r1+r2)//2, c1)
     return b, new_castle, new_ep
 
-def find_king(board, white):
-    k = 'K' if white else 'k'
-    for r in range(8):
-        for c in range(8):
-            if board[r][c]==k: return (r,c)
-    return None
+class PositionStatus:
+    """Coups légaux d'une position, groupés par case de départ, et son statut (échec, mat, pat)"""
+    __slots__ = ('moves', 'by_origin', 'check', 'checkmate', 'stalemate')
 
-def in_check(board, white):
-    king = find_king(board, white)
-    if not king:
-        return True
-    kr,kc = king
-    # pawns
-    if white:
-        for dc in (-1,1):
-            r=kr+1; c=kc+dc
-            if on_board(r,c) and board[r][c]=='p': return True
-    else:
-        for dc in (-1,1):
-            r=kr-1; c=kc+dc
-            if on_board(r,c) and board[r][c]=='P': return True
-    # knights
-    for dr,dc in [(-2,-1),(-2,1),(-1,-2),(-1,2),(1,-2),(1,2),(2,-1),(2,1)]:
-        r,c = kr+dr, kc+dc
-        if on_board(r,c) and board[r][c] != '.' and board[r][c].upper()=='N' and (board[r][c].isupper()!=white):
-            return True
-    # sliders
-    directions = [
-        (-1,0,'RQ'),(1,0,'RQ'),(0,-1,'RQ'),(0,1,'RQ'),
-        (-1,-1,'BQ'),(-1,1,'BQ'),(1,-1,'BQ'),(1,1,'BQ')
-    ]
-    for dr,dc,types in directions:
-        r,c = kr+dr, kc+dc
-        dist=1
-        while on_board(r,c):
-            p = board[r][c]
-            if p!='.':
-                if p.isupper()!=white:
-                    if dist==1 and p.upper()=='K': return True
-                    if p.upper() in types: return True
-                break
-            r+=dr; c+=dc; dist+=1
-    return False
+    def __init__(self, pos):
+        self.moves = pos.legal_moves()
+        self.by_origin = {}
+        for origin, target in self.moves:
+            self.by_origin.setdefault(origin, []).append(target)
+        self.check = pos.in_check()
+        self.checkmate = self.check and not self.moves
+        self.stalemate = not self.check and not self.moves
+
+    def targets(self, r, c):
+        return list(self.by_origin.get((r, c), ()))
+
+_status_cache = OrderedDict()
+_status_lock = threading.Lock()   # AIWorker(use_process=False) runs Facile and Normal in a thread of the UI process
+
+def position_key(board, white, can_castle, en_passant):
+    rights = ''.join(k for k in 'KQkq' if can_castle and can_castle.get(k))
+    return ''.join(map(''.join, board)), white, rights, en_passant
+
+def position_status(board, white, can_castle, en_passant):
+    """PositionStatus de la position, tiré d'un cache LRU de STATUS_CACHE_SIZE positions, propre au processus :
+    l'interface (sélection, cases cibles, statut) ne génère qu'une fois les coups d'une même position.
+    L'IA tourne par défaut dans un autre processus, et Complexe et Impossible cherchent sur Position ;
+    seuls Facile et Normal lancés dans un thread (AIWorker(use_process=False)) profitent du même cache"""
+    if isinstance(board, Position):
+        return PositionStatus(board)
+    key = position_key(board, white, can_castle, en_passant)
+    with _status_lock:
+        status = _status_cache.get(key)
+        if status is not None:
+            _status_cache.move_to_end(key)
+            return status
+    status = PositionStatus(Position.from_board(board, white, can_castle, en_passant))
+    with _status_lock:
+        _status_cache[key] = status
+        if len(_status_cache) > STATUS_CACHE_SIZE:
+            _status_cache.popitem(last=False)
+    return status
 
-def legal_moves(board, white, can_castle, en_passant):
-    moves=[]
-    for r in range(8):
-        for c in range(8):
-            p = board[r][c]
-            if p=='.': continue
-            if p.isupper()!=white: continue
-            for (nr,nc) in generate_pseudo_moves(board,r,c,can_castle,en_passant):
-                candidate = ((r,c),(nr,nc))
-                nb, ncst, nep = make_move(board, candidate, can_castle, en_passant)
-                if not in_check(nb, white):
-                    moves.append(candidate)
-    return moves
+def legal_moves(board, white, can_castle, en_passant, captures_only=False):
+    """captures_only : seulement les prises, la prise en passant et les promotions (recherche de quiétude)"""
+    if isinstance(board, Position):
+        return board.legal_moves(captures_only)
+    if not captures_only:
+        return list(position_status(board, white, can_castle, en_passant).moves)
+    # one Position per call; checkers and pins are computed once, no per-move legality test
+    return Position.from_board(board, white, can_castle, en_passant).legal_moves(captures_only)
 
 def is_checkmate(board, white, can_castle, en_passant):
-    return in_check(board, white) and len(legal_moves(board, white, can_castle, en_passant))==0
+    return position_status(board, white, can_castle, en_passant).checkmate
 
 def is_stalemate(board, white, can_castle, en_passant):
-    return (not in_check(board, white)) and len(legal_moves(board, white, can_castle, en_passant))==0
\ No newline at end of file
+    return position_status(board, white, can_castle, en_passant).stalemate
@@ -0,0 +1,68 @@
+from .evaluation import PIECE_VALUES
+
+MAX_PLY = 128
+HASH_SCORE = 10**7
+CAPTURE_SCORE = 10**6
+KILLER_SCORES = (900000, 800000)
+HISTORY_MAX = 700000   # history scores stay below the killers
+
+def new_killers():
+    return [[None, None] for _ in range(MAX_PLY)]
+
+def new_history():
+    return [0] * 4096   # indexed by from*64+to
+
+def age_history(history):
+    for i in range(4096):
+        history[i] >>= 1
+
+def is_quiet(pos, move):
+    (r1,c1),(r2,c2) = move
+    t = r2*8+c2
+    p = pos.squares[r1*8+c1]
+    if pos.squares[t] != '.': return False
+    if p in 'Pp' and (t == pos.ep or r2 == 0 or r2 == 7): return False
+    return True
+
+def mvv_lva(pos, move):
+    """Victime la plus chère d'abord, puis l'attaquant le moins cher (0 pour un coup calme)"""
+    (r1,c1),(r2,c2) = move
+    attacker = pos.squares[r1*8+c1].upper()
+    victim = pos.squares[r2*8+c2]
+    if victim != '.':
+        score = PIECE_VALUES[victim.upper()] * 10 - PIECE_VALUES[attacker] // 100
+    elif attacker == 'P' and r2*8+c2 == pos.ep:
+        score = PIECE_VALUES['P'] * 10 - 1
+    else:
+        score = 0
+    if attacker == 'P' and (r2 == 0 or r2 == 7):
+        score += PIECE_VALUES['Q'] * 10
+    return score
+
+def order_moves(pos, moves, hash_move, info, ply):
+    """Coup de la table de hachage, captures (MVV-LVA), coups tueurs puis historique"""
+    killers = info.killers[ply] if ply < MAX_PLY else (None, None)
+    history = info.history
+    def score(m):
+        if m == hash_move: return HASH_SCORE
+        s = mvv_lva(pos, m)
+        if s: return CAPTURE_SCORE + s
+        if m == killers[0]: return KILLER_SCORES[0]
+        if m == killers[1]: return KILLER_SCORES[1]
+        (r1,c1),(r2,c2) = m
+        return min(history[(r1*8+c1)*64 + r2*8+c2], HISTORY_MAX)
+    moves.sort(key=score, reverse=True)
+    return moves
+
+def record_cutoff(pos, move, depth, ply, index, info):
+    info.cutoffs += 1
+    if index == 0:
+        info.first_cutoffs += 1
+    if not is_quiet(pos, move):
+        return
+    if ply < MAX_PLY:
+        slot = info.killers[ply]
+        if slot[0] != move:
+            slot[1] = slot[0]; slot[0] = move
+    (r1,c1),(r2,c2) = move
+    info.history[(r1*8+c1)*64 + r2*8+c2] += depth * depth
@@ -0,0 +1,118 @@
+"""Recherche parallèle (Lazy SMP) : des processus auxiliaires cherchent la même position et partagent
+la table de transposition en mémoire partagée ; le processus principal garde la décision.
+
+    python -m engine.parallel --depth 5 --workers 1,2,4     # accélération selon le nombre de coeurs
+"""
+import argparse, multiprocessing, os, sys, time
+from .bitboard import Position
+from .fen import parse_fen
+from .perft import POSITIONS
+from .search import SearchInfo, SearchAborted, iterative_deepening, minimax_ab, INF, MAX_DEPTH
+from .tt import TranspositionTable
+from .bitbase import open_bitbases
+
+_helper = {}
+
+class _Flag:
+    """Jeton d'annulation (is_set) lu par les auxiliaires sur un entier partagé"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def is_set(self):
+        return self.value.value != 0
+
+def _init_helper(shm_name, size_mb, stop):
+    _helper['tt'] = TranspositionTable.shared(size_mb, shm_name)
+    _helper['stop'] = stop
+
+def _helper_search(pos, generation, index):
+    """Approfondissement itératif sans limite de temps jusqu'au signal d'arrêt ; les auxiliaires impairs
+    commencent une profondeur plus loin pour désynchroniser les recherches"""
+    tt = _helper['tt']
+    tt.generation = generation
+    info = SearchInfo(tt)
+    info.cancel = _Flag(_helper['stop'])
+    info.bitbases = open_bitbases()
+    try:
+        for depth in range(1 + index % 2, MAX_DEPTH+1):
+            minimax_ab(pos, depth, -INF, INF, info)
+    except SearchAborted:
+        pass
+    return info.nodes
+
+
+class ParallelSearch:
+    """Pool de workers-1 processus auxiliaires, lancé une fois et réutilisé d'une recherche à l'autre"""
+
+    def __init__(self, workers=None, tt_mb=16):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.tt = TranspositionTable.shared(tt_mb)
+        ctx = multiprocessing.get_context('spawn')
+        self.stop = ctx.RawValue('b', 0)
+        self.pool = None
+        if self.workers > 1:
+            self.pool = ctx.Pool(self.workers - 1, initializer=_init_helper, initargs=(self.tt.shm.name, tt_mb, self.stop))
+
+    def search(self, pos, max_depth, soft=None, hard=None, cancel=None, on_iteration=None, ponder=None):
+        """Même contrat que iterative_deepening ; retourne (coup, score, info) avec info.nodes
+        cumulant les noeuds des auxiliaires"""
+        info = SearchInfo(self.tt)
+        info.cancel = cancel
+        info.ponder = ponder
+        info.bitbases = open_bitbases()
+        self.stop.value = 0
+        jobs = []
+        if self.pool is not None and len(pos.legal_moves()) > 1:
+            generation = (self.tt.generation + 1) & 63   # the one iterative_deepening is about to start
+            jobs = [self.pool.apply_async(_helper_search, (pos, generation, i)) for i in range(self.workers - 1)]
+        try:
+            move, score = iterative_deepening(pos, max_depth, soft, hard, info, on_iteration)
+        finally:
+            self.stop.value = 1
+            for job in jobs:
+                info.nodes += job.get()
+        return move, score, info
+
+    def close(self):
+        if self.pool is not None:
+            self.stop.value = 1
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self.tt.close(unlink=True)
+
+
+def _time_to_depth(searcher, depth):
+    total_time = 0.0; total_nodes = 0
+    for name, fen, _ in POSITIONS:
+        board, white, can_castle, en_passant, _, _ = parse_fen(fen)
+        pos = Position.from_board(board, white, can_castle, en_passant)
+        searcher.tt.clear()
+        t0 = time.perf_counter()
+        move, score, info = searcher.search(pos, depth)
+        total_time += time.perf_counter() - t0
+        total_nodes += info.nodes
+    return total_time, total_nodes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accélération de la recherche parallèle selon le nombre de processus")
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--workers', default=None, help="liste, par ex. 1,2,4 (défaut : 1 puis tous les coeurs)")
+    parser.add_argument('--hash', type=float, default=16)
+    args = parser.parse_args(argv)
+    counts = [int(w) for w in args.workers.split(',')] if args.workers else sorted({1, os.cpu_count() or 1})
+    print(f"{os.cpu_count()} coeurs disponibles, profondeur {args.depth}, {len(POSITIONS)} positions")
+    base = None
+    for n in counts:
+        searcher = ParallelSearch(n, args.hash)
+        try:
+            dt, nodes = _time_to_depth(searcher, args.depth)
+        finally:
+            searcher.close()
+        base = base or dt
+        print(f"{n:>3} processus  {dt:7.2f}s  {nodes:>9} noeuds  {nodes/dt if dt else 0:8.0f} nps  accélération x{base/dt if dt else 0:.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
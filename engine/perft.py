@@ -0,0 +1,125 @@
+"""Perft : compte les feuilles de l'arbre des coups légaux pour vérifier et chronométrer movegen.
+
+    python -m engine.perft                 # positions de référence, profondeur 3
+    python -m engine.perft --depth 4 --divide --fen "<FEN>"
+    python -m engine.perft --list          # via l'API liste (movegen.make_move)
+"""
+import argparse, sys, time
+from .bitboard import Position
+from .board import idx_to_alg
+from .fen import parse_fen, START_FEN
+from .movegen import legal_moves, make_move
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# (name, fen, expected node counts for depth 1, 2, 3, ...)
+POSITIONS = [
+    ("Départ", START_FEN, [20, 400, 8902, 197281, 4865609]),
+    ("Kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603]),
+    ("Position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("Position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333]),
+    ("Position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+    ("Position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890, 3894594]),
+]
+
+PROMOTIONS = ('Q', 'R', 'B', 'N')
+
+def _promotions(piece, move):
+    if piece in 'Pp' and move[1][0] in (0, 7):
+        return PROMOTIONS
+    return (None,)
+
+def perft(pos, depth):
+    if depth == 0:
+        return 1
+    moves = pos.legal_moves()
+    if depth == 1:
+        return sum(len(_promotions(pos.squares[m[0][0]*8+m[0][1]], m)) for m in moves)
+    nodes = 0
+    for m in moves:
+        for promo in _promotions(pos.squares[m[0][0]*8+m[0][1]], m):
+            undo = pos.make_move(m, promo)
+            nodes += perft(pos, depth-1)
+            pos.unmake_move(undo)
+    return nodes
+
+def move_name(move, promo=None):
+    (r1,c1),(r2,c2) = move
+    return idx_to_alg(r1,c1) + idx_to_alg(r2,c2) + (promo.lower() if promo else '')
+
+def divide(pos, depth):
+    """Nombre de feuilles sous chaque coup racine, {'e2e4': n, ...}"""
+    result = {}
+    for m in pos.legal_moves():
+        for promo in _promotions(pos.squares[m[0][0]*8+m[0][1]], m):
+            undo = pos.make_move(m, promo)
+            result[move_name(m, promo)] = perft(pos, depth-1)
+            pos.unmake_move(undo)
+    return result
+
+def perft_board(board, white, can_castle, en_passant, depth):
+    """Même comptage avec l'API liste (make_move par copie), pour comparer avant/après"""
+    if depth == 0:
+        return 1
+    nodes = 0
+    for m in legal_moves(board, white, can_castle, en_passant):
+        (r1,c1),_ = m
+        for promo in _promotions(board[r1][c1], m):
+            if promo and not white: promo = promo.lower()
+            nb, ncst, nep = make_move(board, m, can_castle, en_passant, promo)
+            nodes += perft_board(nb, not white, ncst, nep, depth-1)
+    return nodes
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024*1024) if sys.platform == 'darwin' else peak / 1024
+
+def run(fen, depth, use_list=False, show_divide=False):
+    board, white, can_castle, en_passant, _, _ = parse_fen(fen)
+    t0 = time.perf_counter()
+    if show_divide:
+        pos = Position.from_board(board, white, can_castle, en_passant)
+        counts = divide(pos, depth)
+        for name in sorted(counts):
+            print(f"  {name}: {counts[name]}")
+        nodes = sum(counts.values())
+    elif use_list:
+        nodes = perft_board(board, white, can_castle, en_passant, depth)
+    else:
+        nodes = perft(Position.from_board(board, white, can_castle, en_passant), depth)
+    return nodes, time.perf_counter() - t0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft et débit du générateur de coups")
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fen', help="position à tester (sinon les positions de référence)")
+    parser.add_argument('--divide', action='store_true', help="détail par coup racine")
+    parser.add_argument('--list', action='store_true', help="passe par l'API liste au lieu de Position")
+    args = parser.parse_args(argv)
+
+    positions = [("FEN", args.fen, [])] if args.fen else POSITIONS
+    failures = 0
+    total_nodes = 0; total_time = 0.0
+    for name, fen, expected in positions:
+        if args.divide:
+            print(f"{name} ({fen})")
+        nodes, dt = run(fen, args.depth, args.list, args.divide)
+        total_nodes += nodes; total_time += dt
+        want = expected[args.depth-1] if 0 < args.depth <= len(expected) else None
+        status = "" if want is None else ("OK" if nodes == want else f"ÉCHEC (attendu {want})")
+        if want is not None and nodes != want: failures += 1
+        nps = nodes / dt if dt > 0 else 0
+        print(f"{name:<12} depth {args.depth}  nodes {nodes:>9}  {dt:7.2f}s  {nps:9.0f} nps  {status}")
+    peak = peak_memory_mb()
+    nps = total_nodes / total_time if total_time > 0 else 0
+    print(f"Total: {total_nodes} nodes en {total_time:.2f}s ({nps:.0f} nps)"
+          + (f", mémoire max {peak:.1f} Mo" if peak is not None else ""))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
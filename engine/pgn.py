@@ -0,0 +1,319 @@
+"""Lecture et écriture de fichiers PGN en flux (une partie à la fois) et notation algébrique standard (SAN).
+
+    python -m engine.pgn validate archive.pgn [autre.pgn ...] --processes 4
+    python -m engine.pgn convert archive.pgn -o propre.pgn       # SAN et mise en page normalisées
+"""
+import argparse, io, multiprocessing, os, re, sys, time
+from collections import deque
+from .bitboard import Position
+from .board import FILES, alg_to_idx, idx_to_alg, move_to_uci, uci_to_move
+from .fen import parse_fen, START_FEN
+from .timecontrol import GameState
+
+TAG_RE = re.compile(r'\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]')
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+SEVEN_TAGS = ['Event', 'Site', 'Date', 'Round', 'White', 'Black', 'Result']
+BATCH_GAMES = 200   # games per task in bulk mode
+SAN_RE = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+
+
+def start_position(headers):
+    """Position de départ d'une partie (balise FEN si présente)"""
+    board, white, can_castle, en_passant, _, _ = parse_fen(headers.get('FEN', START_FEN))
+    return Position.from_board(board, white, can_castle, en_passant)
+
+def parse_san(pos, san, legal=None):
+    """'Nbd7', 'exd5', 'O-O', 'e8=Q+'... -> (coup, promotion ou None) parmi les coups légaux de pos
+    (legal : ces coups s'ils sont déjà calculés)"""
+    if legal is None:
+        legal = pos.legal_moves()
+    san = san.rstrip('+#!?')
+    white = pos.white
+    if san in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        r = 7 if white else 0
+        move = ((r, 4), (r, 6 if len(san) == 3 else 2))
+        if pos.squares[r*8+4] in 'Kk' and move in legal:
+            return move, None
+        raise ValueError(f"roque illégal : {san}")
+    m = SAN_RE.match(san)
+    if not m:
+        raise ValueError(f"coup illisible : {san}")
+    piece, from_file, from_rank, target, promo = m.groups()
+    piece = piece or 'P'
+    to = alg_to_idx(target)
+    found = []
+    for move in legal:
+        (r1,c1), dest = move
+        if dest != to or pos.squares[r1*8+c1].upper() != piece:
+            continue
+        if from_file and FILES[c1] != from_file: continue
+        if from_rank and str(8-r1) != from_rank: continue
+        found.append(move)
+    if len(found) != 1:
+        raise ValueError(f"coup {'ambigu' if found else 'illégal'} : {san}")
+    if promo:
+        promo = promo if white else promo.lower()
+    elif piece == 'P' and to[0] in (0, 7):
+        promo = 'Q' if white else 'q'
+    return found[0], promo
+
+def move_to_san(pos, move, promo=None, legal=None):
+    """Notation SAN du coup légal move dans pos (désambiguïsation, prise, promotion, échec et mat)"""
+    (r1,c1),(r2,c2) = move
+    p = pos.squares[r1*8+c1].upper()
+    if legal is None and p != 'P':
+        legal = pos.legal_moves()
+    if p == 'K' and abs(c2-c1) == 2:
+        san = 'O-O' if c2 > c1 else 'O-O-O'
+    else:
+        capture = pos.squares[r2*8+c2] != '.' or (p == 'P' and c1 != c2)
+        if p == 'P':
+            san = (FILES[c1] + 'x' if capture else '') + idx_to_alg(r2, c2)
+            if r2 in (0, 7):
+                san += '=' + (promo or 'Q').upper()
+        else:
+            rivals = [a for a, b in legal if b == (r2,c2) and a != (r1,c1) and pos.squares[a[0]*8+a[1]].upper() == p]
+            if not rivals:
+                which = ''
+            elif all(c != c1 for _, c in rivals):
+                which = FILES[c1]
+            elif all(r != r1 for r, _ in rivals):
+                which = str(8-r1)
+            else:
+                which = idx_to_alg(r1, c1)
+            san = p + which + ('x' if capture else '') + idx_to_alg(r2, c2)
+    undo = pos.make_move(move, promo)
+    if pos.in_check():
+        san += '#' if not pos.legal_moves() else '+'
+    pos.unmake_move(undo)
+    return san
+
+def write_game(stream, headers, sans, result, first_white=True, first_number=1):
+    """Écrit une partie PGN : balises (les sept obligatoires d'abord) puis coups numérotés, 80 colonnes au plus"""
+    headers = dict(headers, Result=result)
+    for tag in SEVEN_TAGS + [t for t in headers if t not in SEVEN_TAGS]:
+        value = str(headers.get(tag, '?')).replace('\\', '\\\\').replace('"', '\\"')
+        stream.write(f'[{tag} "{value}"]\n')
+    words = []
+    number, white = first_number, first_white
+    for i, san in enumerate(sans):
+        if white:
+            words.append(f"{number}. {san}")
+        else:
+            words.append(f"{number}... {san}" if i == 0 else san)
+            number += 1
+        white = not white
+    words.append(result)
+    line = ''
+    stream.write('\n')
+    for word in words:
+        if line and len(line) + 1 + len(word) > 80:
+            stream.write(line + '\n')
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    stream.write(line + '\n\n')
+
+def _tokens(text):
+    """Coups SAN et résultat d'un texte de partie, sans commentaires, variantes, NAG ni numéros"""
+    text = re.sub(r'\{[^}]*\}|;[^\n]*', ' ', text)
+    while '(' in text:
+        stripped = re.sub(r'\([^()]*\)', ' ', text)
+        if stripped == text:
+            break
+        text = stripped
+    for tok in text.split():
+        tok = re.sub(r'^\d+\.+', '', tok)
+        if tok and not tok.startswith('$'):
+            yield tok
+
+def iter_game_texts(stream):
+    """Générateur des lignes de chaque partie : le fichier est lu ligne par ligne, jamais en entier"""
+    lines, in_moves = [], False
+    for line in stream:
+        line = line.strip()
+        if line.startswith('['):
+            if in_moves:
+                yield lines
+                lines, in_moves = [], False
+            lines.append(line)
+        elif line:
+            lines.append(line)
+            in_moves = True
+            if line.split()[-1] in RESULTS:
+                yield lines
+                lines, in_moves = [], False
+    if lines:
+        yield lines
+
+def parse_game(lines):
+    """Lignes d'une partie -> (balises, coups SAN, résultat)"""
+    headers, movetext = {}, []
+    for line in lines:
+        if line.startswith('['):
+            m = TAG_RE.match(line)
+            if m:
+                headers[m.group(1)] = re.sub(r'\\(.)', r'\1', m.group(2))
+        else:
+            movetext.append(line)
+    return _finish(headers, movetext)
+
+def read_games(stream):
+    """Générateur de (balises, coups SAN, résultat), partie après partie"""
+    for lines in iter_game_texts(stream):
+        yield parse_game(lines)
+
+def _finish(headers, movetext):
+    sans = list(_tokens(' '.join(movetext)))
+    result = headers.get('Result', '*')
+    if sans and sans[-1] in RESULTS:
+        result = sans.pop()
+    return headers, sans, result
+
+
+def game_state_sans(state):
+    """Coups SAN de state.move_history, rejoués depuis state.start_fen"""
+    board, white, can_castle, en_passant, _, _ = parse_fen(state.start_fen)
+    pos = Position.from_board(board, white, can_castle, en_passant)
+    sans = []
+    for h in state.move_history:
+        move, promo = uci_to_move(h['algebraic'])
+        if promo:
+            promo = promo.upper() if pos.white else promo.lower()
+        sans.append(move_to_san(pos, move, promo))
+        pos.make_move(move, promo)
+    return sans
+
+def write_game_state(stream, state, headers=None, result=None):
+    """Écrit la partie d'un GameState ; le résultat vient du mat ou du pat s'il n'est pas donné"""
+    if result is None:
+        status = state.status()
+        result = ('0-1' if state.white_to_move else '1-0') if status.checkmate else '1/2-1/2' if status.stalemate else '*'
+    tags = {'Event': "Partie chess.bite", 'Site': "chess.bite", 'Date': time.strftime('%Y.%m.%d'), 'Round': '-',
+            'White': "Humain", 'Black': f"IA ({state.ai_level})" if state.vs_ai else "Humain"}
+    fen = parse_fen(state.start_fen)
+    if state.start_fen != START_FEN:
+        tags['SetUp'], tags['FEN'] = '1', state.start_fen
+    tags.update(headers or {})
+    write_game(stream, tags, game_state_sans(state), result, fen[1], fen[5])
+
+def game_state_from_pgn(headers, sans):
+    """GameState au bout de la partie (move_history en notation UCI, sans temps de réflexion)"""
+    state = GameState()
+    if 'FEN' in headers:
+        state.set_fen(headers['FEN'])
+    pos = start_position(headers)
+    for san in sans:
+        move, promo = parse_san(pos, san)
+        player = 'W' if pos.white else 'B'
+        pos.make_move(move, promo)
+        state.apply_move(move, promo)
+        state.move_history.append({'move': move, 'algebraic': move_to_uci(move, promo), 'time': 0.0, 'player': player})
+    return state
+
+def check_game(lines, convert=False):
+    """Rejoue une partie : (demi-coups, erreur ou None, texte PGN normalisé si convert)"""
+    headers, sans, result = parse_game(lines)
+    plies = 0
+    try:
+        pos = start_position(headers)
+        first_white, number = pos.white, parse_fen(headers.get('FEN', START_FEN))[5]
+        out = []
+        for san in sans:
+            legal = pos.legal_moves()
+            move, promo = parse_san(pos, san, legal)
+            if convert:
+                out.append(move_to_san(pos, move, promo, legal))
+            pos.make_move(move, promo)
+            plies += 1
+    except (ValueError, IndexError, KeyError) as e:
+        return plies, f"{e} (demi-coup {plies + 1})", None
+    if not convert:
+        return plies, None, None
+    text = io.StringIO()
+    write_game(text, headers, out, result, first_white, number)
+    return plies, None, text.getvalue()
+
+def _check_batch(batch, convert):
+    return [(index, *check_game(lines, convert)) for index, lines in batch]
+
+def bulk(paths, out=None, processes=1, max_errors=20):
+    """Valide (ou, avec out, réécrit) les parties des fichiers paths sur un pool de processus.
+    Les fichiers sont lus en flux et au plus 2*processes lots sont en vol : la mémoire ne dépend pas de leur taille."""
+    stats = {'games': 0, 'valid': 0, 'plies': 0, 'errors': []}
+
+    def batches():
+        batch, n = [], 0
+        for path in paths:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                for lines in iter_game_texts(f):
+                    batch.append((n, lines))
+                    n += 1
+                    if len(batch) == BATCH_GAMES:
+                        yield batch
+                        batch = []
+        if batch:
+            yield batch
+
+    def consume(results):
+        for index, plies, error, text in results:
+            stats['games'] += 1
+            stats['plies'] += plies
+            if error is None:
+                stats['valid'] += 1
+                if out is not None:
+                    out.write(text)
+            elif len(stats['errors']) < max_errors:
+                stats['errors'].append((index + 1, error))
+
+    convert = out is not None
+    if processes <= 1:
+        for batch in batches():
+            consume(_check_batch(batch, convert))
+        return stats
+    pool = multiprocessing.get_context('spawn').Pool(processes)
+    pending = deque()
+    try:
+        for batch in batches():
+            pending.append(pool.apply_async(_check_batch, (batch, convert)))
+            if len(pending) >= 2 * processes:
+                consume(pending.popleft().get())
+        while pending:
+            consume(pending.popleft().get())
+    finally:
+        pool.terminate()
+        pool.join()
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validation et conversion de fichiers PGN en masse")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    v = sub.add_parser('validate', help="rejouer chaque partie et signaler les coups illisibles ou illégaux")
+    v.add_argument('pgn', nargs='+')
+    c = sub.add_parser('convert', help="réécrire les parties valides avec une SAN et une mise en page normalisées")
+    c.add_argument('pgn', nargs='+')
+    c.add_argument('-o', '--out', required=True)
+    for p in (v, c):
+        p.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+    for path in args.pgn:
+        if not os.path.isfile(path):
+            parser.error(f"fichier introuvable : {path}")
+
+    t0 = time.perf_counter()
+    out = open(args.out, 'w', encoding='utf-8') if args.cmd == 'convert' else None
+    try:
+        stats = bulk(args.pgn, out, args.processes)
+    finally:
+        if out:
+            out.close()
+    dt = time.perf_counter() - t0
+    for number, error in stats['errors']:
+        print(f"partie {number} : {error}")
+    invalid = stats['games'] - stats['valid']
+    print(f"{stats['games']} parties ({stats['valid']} valides, {invalid} invalides), {stats['plies']} demi-coups "
+          f"en {dt:.1f}s : {stats['games'] / dt if dt else 0:.0f} parties/s, {stats['plies'] / dt if dt else 0:.0f} demi-coups/s")
+    return 1 if invalid else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
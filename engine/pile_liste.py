@@ -1,64 +1,96 @@
-class Node:
-    def __init__(self, data):
-        self.data = data
-        self.next = None
-
-
 class Liste_chaine:
+    """Liste chaînée rangée dans des tableaux : le maillon i a pour valeur data[i], pour voisins suivant[i] et
+    precedent[i] (-1 : aucun). Les cases des maillons retirés sont réutilisées, pop ne parcourt rien."""
+    __slots__ = ('data', 'suivant', 'precedent', 'libres', 'head', 'tail', 'size')
+
     def __init__(self):
-        self.head = None
-        self.tail = None
+        self.data = []
+        self.suivant = []
+        self.precedent = []
+        self.libres = []   # indices of free slots
+        self.head = -1
+        self.tail = -1
         self.size = 0
 
     def append(self, data):
-        new_node = Node(data)
-        if not self.head:
-            self.head = new_node
+        if self.libres:
+            i = self.libres.pop()
+            self.data[i], self.suivant[i], self.precedent[i] = data, -1, self.tail
         else:
-            self.tail.next = new_node
-        self.tail = new_node
+            i = len(self.data)
+            self.data.append(data)
+            self.suivant.append(-1)
+            self.precedent.append(self.tail)
+        if self.tail == -1:
+            self.head = i
+        else:
+            self.suivant[self.tail] = i
+        self.tail = i
         self.size += 1
 
     def pop(self):
-        if not self.head:
+        if self.tail == -1:
             return None
-        if self.head == self.tail:
-            data = self.head.data
-            self.head = self.tail = None
-            self.size -= 1
-            return data
-        current = self.head
-        while current.next != self.tail:
-            current = current.next
-        data = self.tail.data
-        current.next = None
-        self.tail = current
+        i = self.tail
+        data = self.data[i]
+        self.data[i] = None
+        self.tail = self.precedent[i]
+        if self.tail == -1:
+            self.head = -1
+        else:
+            self.suivant[self.tail] = -1
+        self.libres.append(i)
         self.size -= 1
         return data
 
+    def last(self):
+        return None if self.tail == -1 else self.data[self.tail]
+
+    def __iter__(self):
+        i = self.head
+        while i != -1:
+            yield self.data[i]
+            i = self.suivant[i]
+
     def __len__(self):
         return self.size
 
 
 class Pile_LIFO:
+    """Pile sur un tableau : top est le nombre d'éléments, les cases libérées par pop resservent au push suivant"""
+    __slots__ = ('items', 'top')
+
     def __init__(self):
         self.items = []
+        self.top = 0
 
     def push(self, item):
-        self.items.append(item)
+        if self.top < len(self.items):
+            self.items[self.top] = item
+        else:
+            self.items.append(item)
+        self.top += 1
 
     def pop(self):
         if not self.is_empty():
-            return self.items.pop()
+            self.top -= 1
+            item = self.items[self.top]
+            self.items[self.top] = None
+            return item
         return None
 
     def peek(self):
         if not self.is_empty():
-            return self.items[-1]
+            return self.items[self.top - 1]
         return None
 
+    def clear(self):
+        for i in range(self.top):
+            self.items[i] = None
+        self.top = 0
+
     def is_empty(self):
-        return len(self.items) == 0
+        return self.top == 0
 
     def __len__(self):
-        return len(self.items)
+        return self.top
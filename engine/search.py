@@ -0,0 +1,253 @@
+import time
+from .evaluation import evaluate, PIECE_VALUES
+from .tt import EXACT, LOWER, UPPER
+from .ordering import MAX_PLY, new_killers, new_history, age_history, order_moves, record_cutoff, mvv_lva
+
+INF = 10**9
+MAX_DEPTH = 64
+MATE = 1000000
+MATE_BOUND = MATE - 1000   # |score| above this is a mate in (MATE - |score|) plies
+CHECK_EVERY = 1024         # nodes between two clock checks
+SOFT_STOP = 0.5            # do not start a new iteration past this share of the soft limit
+DELTA_MARGIN = 200         # quiescence: skip captures that cannot lift the score back to the window
+
+
+class SearchAborted(Exception):
+    pass
+
+
+class SearchInfo:
+    """État partagé d'une recherche : table de transposition, compteurs, limite dure et arrêt demandé"""
+
+    def __init__(self, tt=None, hard_deadline=None):
+        self.tt = tt
+        self.nodes = 0
+        self.hard_deadline = hard_deadline
+        self.stop = False
+        self.cancel = None   # object with is_set(), polled with the clock (cancellation from the UI)
+        self.ponder = None   # same, set when the predicted move is played: the clock starts then
+        self.bitbases = None  # engine.bitbase.Bitbases probed below the root
+        self.start = None
+        self.hard_limit = None
+        self.depth = 0
+        self.qnodes = 0
+        self.quiescence = True
+        self.ordering = True
+        self.killers = new_killers()
+        self.history = new_history()
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+
+    def stats(self):
+        """Compteurs de la recherche : noeuds, coupures (part sur le premier coup essayé), table de hachage"""
+        stats = {'nodes': self.nodes, 'qnodes': self.qnodes, 'depth': self.depth, 'cutoffs': self.cutoffs,
+                 'first_move_cutoff_rate': self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0}
+        if self.tt is not None:
+            stats['tt'] = self.tt.stats()
+        return stats
+
+    def ponder_hit(self):
+        """Le coup prévu pendant la réflexion anticipée a été joué : le temps compte à partir de maintenant"""
+        self.ponder = None
+        self.start = time.perf_counter()
+        if self.hard_limit is not None:
+            self.hard_deadline = self.start + self.hard_limit
+
+    def check(self):
+        if self.cancel is not None and self.cancel.is_set():
+            self.stop = True
+        if self.ponder is not None and self.ponder.is_set():
+            self.ponder_hit()
+        if self.stop or (self.hard_deadline is not None and time.perf_counter() >= self.hard_deadline):
+            raise SearchAborted()
+
+def _to_tt(score, ply):
+    if score > MATE_BOUND: return score + ply
+    if score < -MATE_BOUND: return score - ply
+    return score
+
+def _from_tt(score, ply):
+    if score > MATE_BOUND: return score - ply
+    if score < -MATE_BOUND: return score + ply
+    return score
+
+def minimax_ab(pos, depth, alpha, beta, info=None, ply=0):
+    if info is None:
+        info = SearchInfo()
+    info.nodes += 1
+    if info.stop or not info.nodes % CHECK_EVERY:
+        info.check()
+    white = pos.white
+    if ply and (pos.halfmove >= 100 or pos.is_repetition()):
+        return 0, None   # draw: a repetition inside the tree counts as the third one
+    if ply and info.bitbases is not None and pos.phase <= 4:
+        sc = info.bitbases.score(pos)
+        # a draw is final; a win is still searched so that the mate shows up, the bitbase score replacing the
+        # evaluation at quiet leaves
+        if sc == 0 or (sc is not None and depth == 0 and not pos.in_check()):
+            return sc, None
+    if depth==0:
+        if info.quiescence:
+            return quiescence(pos, alpha, beta, info, ply), None
+        return evaluate(pos), None
+    tt = info.tt
+    hash_move = None
+    if tt is not None:
+        entry = tt.probe(pos.key)
+        if entry:
+            d, flag, sc, hash_move = entry
+            sc = _from_tt(sc, ply)
+            if d >= depth and (flag == EXACT or (flag == LOWER and sc >= beta) or (flag == UPPER and sc <= alpha)):
+                return sc, hash_move
+    moves = pos.legal_moves()
+    if not moves:
+        if pos.in_check():
+            return (-(MATE - ply) if white else MATE - ply), None
+        else:
+            return 0, None
+    if info.ordering:
+        order_moves(pos, moves, hash_move, info, ply)
+    elif hash_move in moves:
+        moves.remove(hash_move)
+        moves.insert(0, hash_move)
+    alpha0, beta0 = alpha, beta
+    best_move = None
+    if white:
+        value = -INF
+        for i, m in enumerate(moves):
+            undo = pos.make_move(m)
+            try:
+                sc, _ = minimax_ab(pos, depth-1, alpha, beta, info, ply+1)
+            finally:
+                pos.unmake_move(undo)
+            if sc > value:
+                value = sc; best_move = m
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                record_cutoff(pos, m, depth, ply, i, info)
+                break
+    else:
+        value = INF
+        for i, m in enumerate(moves):
+            undo = pos.make_move(m)
+            try:
+                sc, _ = minimax_ab(pos, depth-1, alpha, beta, info, ply+1)
+            finally:
+                pos.unmake_move(undo)
+            if sc < value:
+                value = sc; best_move = m
+            beta = min(beta, value)
+            if alpha >= beta:
+                record_cutoff(pos, m, depth, ply, i, info)
+                break
+    if tt is not None:
+        flag = UPPER if value <= alpha0 else LOWER if value >= beta0 else EXACT
+        tt.store(pos.key, depth, flag, _to_tt(value, ply), best_move)
+    return value, best_move
+
+def _gain(pos, move):
+    """Matériel gagné au mieux par une prise ou une promotion (pour l'élagage delta)"""
+    (r1,c1),(r2,c2) = move
+    victim = pos.squares[r2*8+c2]
+    gain = PIECE_VALUES[victim.upper()] if victim != '.' else PIECE_VALUES['P']
+    if pos.squares[r1*8+c1] in 'Pp' and (r2 == 0 or r2 == 7):
+        gain += PIECE_VALUES['Q'] - PIECE_VALUES['P']
+    return gain
+
+def quiescence(pos, alpha, beta, info, ply):
+    """Prolonge les feuilles tant qu'il reste des prises (toutes les parades si le roi est en échec)"""
+    info.nodes += 1
+    info.qnodes += 1
+    if info.stop or not info.nodes % CHECK_EVERY:
+        info.check()
+    white = pos.white
+    if ply >= MAX_PLY:
+        return evaluate(pos)
+    if pos.in_check():
+        moves = pos.legal_moves()
+        if not moves:
+            return -(MATE - ply) if white else MATE - ply
+        stand = None
+        value = -INF if white else INF
+    else:
+        stand = value = evaluate(pos)
+        if white:
+            if stand >= beta: return stand
+            alpha = max(alpha, stand)
+        else:
+            if stand <= alpha: return stand
+            beta = min(beta, stand)
+        moves = pos.legal_moves(captures_only=True)
+    moves.sort(key=lambda m: mvv_lva(pos, m), reverse=True)
+    for m in moves:
+        if stand is not None:
+            if white and stand + _gain(pos, m) + DELTA_MARGIN <= alpha: continue
+            if not white and stand - _gain(pos, m) - DELTA_MARGIN >= beta: continue
+        undo = pos.make_move(m)
+        try:
+            sc = quiescence(pos, alpha, beta, info, ply+1)
+        finally:
+            pos.unmake_move(undo)
+        if white:
+            if sc > value: value = sc
+            alpha = max(alpha, value)
+        else:
+            if sc < value: value = sc
+            beta = min(beta, value)
+        if alpha >= beta:
+            break
+    return value
+
+def iterative_deepening(pos, max_depth, soft=None, hard=None, info=None, on_iteration=None):
+    """Cherche aux profondeurs 1, 2, 3... et renvoie (coup, score) de la dernière itération terminée.
+    soft : pas de nouvelle itération une fois SOFT_STOP*soft secondes écoulées ;
+    hard : la recherche en cours est interrompue (la profondeur 1 va toujours au bout).
+    Avec info.ponder (réflexion sur le temps adverse) aucune limite ne compte avant info.ponder_hit()."""
+    if info is None:
+        info = SearchInfo()
+    moves = pos.legal_moves()
+    if not moves:
+        return None, 0
+    if len(moves) == 1:
+        return moves[0], evaluate(pos)
+    if info.tt is not None:
+        info.tt.new_search()
+    age_history(info.history)
+    info.start = time.perf_counter()
+    info.hard_limit = hard
+    best, score = moves[0], 0
+    for depth in range(1, max_depth+1):
+        try:
+            sc, mv = minimax_ab(pos, depth, -INF, INF, info)
+        except SearchAborted:
+            break
+        if mv is not None:
+            best, score = mv, sc
+        info.depth = depth
+        if on_iteration:
+            on_iteration(depth, score, best, info)
+        if abs(score) > MATE_BOUND:
+            break
+        if info.ponder is not None:
+            if not info.ponder.is_set():
+                continue
+            info.ponder_hit()
+        if depth == 1 and hard is not None:
+            info.hard_deadline = info.start + hard
+        if soft is not None and time.perf_counter() - info.start >= soft * SOFT_STOP:
+            break
+    return best, score
+
+def principal_variation(pos, tt, max_len=MAX_PLY):
+    """Variation principale lue dans la table de transposition à partir de pos (pos est rendue intacte)"""
+    pv, undos, seen = [], [], set()
+    while len(pv) < max_len and pos.key not in seen:
+        seen.add(pos.key)
+        entry = tt.probe(pos.key)
+        if not entry or entry[3] not in pos.legal_moves():
+            break
+        pv.append(entry[3])
+        undos.append(pos.make_move(entry[3]))
+    for undo in reversed(undos):
+        pos.unmake_move(undo)
+    return pv
@@ -1,10 +1,35 @@
-import time, copy
-from .board import START_BOARD
-from .movegen import make_move
+import time, copy, itertools
+from .bitboard import Position, CASTLE_BITS
+from .board import START_BOARD, move_to_uci
+from .fen import parse_fen, START_FEN
+from .movegen import make_move, position_status
+from .zobrist import PIECE_KEYS, SIDE_KEY, CASTLE_KEYS, EP_KEYS
+
+EXPECTED_GAME_MOVES = 40   # moves per side assumed for a whole game
+MIN_MOVES_LEFT = 10
+HARD_FRACTION = 0.25       # a single move never plans on more than this share of the clock
+UNTIMED_BUDGET = (2.0, 5.0)
+
+_game_ids = itertools.count(1)
+
+def moves_left(ply):
+    return max(MIN_MOVES_LEFT, EXPECTED_GAME_MOVES - ply // 2)
+
+def time_budget(remaining, moves_to_go, increment=0.0):
+    """Retourne (soft, hard) en secondes pour le prochain coup"""
+    if remaining <= 0:
+        return 0.05, 0.1
+    soft = remaining / moves_to_go + increment
+    hard = min(soft * 3, remaining * HARD_FRACTION)
+    return min(soft, hard), hard
+
+def _castle_mask(can_castle):
+    return sum(bit for k, bit in CASTLE_BITS.items() if can_castle.get(k))
 
 class GameState:
     def __init__(self, vs_ai=False, ai_level='Facile', total_time=None):
         self.board = copy.deepcopy(START_BOARD)
+        self.start_fen = START_FEN   # position the move history starts from
         self.white_to_move = True
         self.can_castle = {'K': True, 'Q': True, 'k': True, 'q': True}
         self.en_passant = None
@@ -13,6 +38,10 @@ class GameState:
         self.move_start_time = None
         self.vs_ai = vs_ai
         self.ai_level = ai_level
+        self.game_id = next(_game_ids)
+        self._status = None
+        self.keys = [self._key()]   # Zobrist keys of the positions since the start, current one last
+        self.halfmoves = [0]        # halfmove clock of each of them (plies since a capture or pawn move)
 
         self.total_time = total_time
         if total_time and total_time > 0:
@@ -20,6 +49,7 @@ class GameState:
         else:
             self.total_time = None
             self.remaining_time = {'W': 0.0, 'B': 0.0}
+        self.start_clocks = dict(self.remaining_time)   # clocks at start_fen
 
     def start_move_timer(self):
         self.move_start_time = time.time()
@@ -28,8 +58,12 @@ class GameState:
         if self.move_start_time is None:
             return 0.0
         dt = time.time() - self.move_start_time
-        player = 'W' if self.white_to_move else 'B'
+        self.spend_time('W' if self.white_to_move else 'B', dt)
+        self.move_start_time = None
+        return dt
 
+    def spend_time(self, player, dt):
+        """Décompte dt secondes à player ('W' ou 'B') ; sans pendule le temps s'additionne"""
         if not self.total_time:
             self.remaining_time[player] += dt
         else:
@@ -37,16 +71,142 @@ class GameState:
             if self.remaining_time[player] < 0:
                 self.remaining_time[player] = 0
 
-        self.move_start_time = None
-        return dt
+    def time_budget(self, white=None):
+        """Budget (soft, hard) du camp donné, à partir de son temps restant et des coups qu'il reste à jouer"""
+        if white is None:
+            white = self.white_to_move
+        if not self.total_time:
+            return UNTIMED_BUDGET
+        remaining = self.remaining_time['W' if white else 'B']
+        if self.move_start_time is not None and white == self.white_to_move:
+            remaining -= time.time() - self.move_start_time
+        return time_budget(remaining, moves_left(len(self.move_history)))
+
+    def ai_state(self):
+        """Dictionnaire passé aux fonctions de AI_BY_NAME (position, horloges à l'instant présent, coups joués)"""
+        remaining = dict(self.remaining_time)
+        if self.total_time and self.move_start_time is not None:
+            player = 'W' if self.white_to_move else 'B'
+            remaining[player] = max(0.0, remaining[player] - (time.time() - self.move_start_time))
+        return {
+            'board': self.board,
+            'white_to_move': self.white_to_move,
+            'can_castle': self.can_castle,
+            'en_passant': self.en_passant,
+            'time_budget': self.time_budget(),
+            'remaining_time': remaining,
+            'total_time': self.total_time,
+            'moves': [h.get('algebraic', '') for h in self.move_history],
+            'keys': self.keys[:-1],
+            'halfmove': self.halfmove,
+            'game_id': self.game_id
+        }
+
+    def ponder_state(self, move):
+        """ai_state() après le coup supposé de l'adversaire (promotion en dame), pour la réflexion anticipée"""
+        gs = self.ai_state()
+        (r1,c1),(r2,c2) = move
+        p = self.board[r1][c1]
+        promo = ('Q' if p.isupper() else 'q') if p in 'Pp' and r2 in (0, 7) else None
+        gs['board'], gs['can_castle'], gs['en_passant'] = make_move(self.board, move, self.can_castle, self.en_passant, promo)
+        gs['white_to_move'] = not self.white_to_move
+        gs['time_budget'] = self.time_budget(not self.white_to_move)
+        gs['moves'] = gs['moves'] + [move_to_uci(move, promo)]
+        gs['keys'] = self.keys[:]
+        gs['halfmove'] = 0 if p in 'Pp' or self.board[r2][c2] != '.' else self.halfmove + 1
+        return gs
+
+    def status(self):
+        """PositionStatus de la position courante (coups par case de départ, échec, mat, pat),
+        gardé jusqu'au prochain changement de position"""
+        if self._status is None:
+            self._status = position_status(self.board, self.white_to_move, self.can_castle, self.en_passant)
+        return self._status
+
+    def position_changed(self):
+        """À appeler après avoir modifié board / white_to_move / can_castle / en_passant à la main"""
+        self._status = None
 
     def apply_move(self, move, promote_to=None):
         b, new_castle, new_ep = make_move(self.board, move, self.can_castle, self.en_passant, promote_to)
         (r1,c1),(r2,c2) = move
+        irreversible = self.board[r1][c1] in 'Pp' or self.board[r2][c2] != '.'
+        key = self._move_key(move, b, new_castle, new_ep)
         self.board = b
         self.can_castle = new_castle
         self.en_passant = new_ep
         self.white_to_move = not self.white_to_move
+        self._status = None
+        self.keys.append(key)
+        self.halfmoves.append(0 if irreversible else self.halfmoves[-1] + 1)
+
+    def _key(self):
+        """Clé Zobrist complète de la position (départ, position posée à la main)"""
+        return Position.from_board(self.board, self.white_to_move, self.can_castle, self.en_passant).key
+
+    def _move_key(self, move, board, can_castle, en_passant):
+        """Clé après move, tirée de la clé courante : seules les cases touchées, le trait, les roques et la
+        prise en passant changent (board, can_castle, en_passant : la position d'après)"""
+        (r1,c1),(r2,c2) = move
+        old = self.board
+        p, captured = old[r1][c1], old[r2][c2]
+        # board[r2][c2] is the promoted piece after a promotion
+        key = self.keys[-1] ^ SIDE_KEY ^ PIECE_KEYS[p][r1*8+c1] ^ PIECE_KEYS[board[r2][c2]][r2*8+c2]
+        if captured != '.':
+            key ^= PIECE_KEYS[captured][r2*8+c2]
+        elif p in 'Pp' and c1 != c2:
+            key ^= PIECE_KEYS[old[r1][c2]][r1*8+c2]   # en passant
+        if p in 'Kk' and abs(c2-c1) == 2:
+            rook = 'R' if p == 'K' else 'r'
+            key ^= PIECE_KEYS[rook][r1*8 + (7 if c2 > c1 else 0)] ^ PIECE_KEYS[rook][r1*8 + (5 if c2 > c1 else 3)]
+        if can_castle != self.can_castle:
+            key ^= CASTLE_KEYS[_castle_mask(self.can_castle)] ^ CASTLE_KEYS[_castle_mask(can_castle)]
+        if self.en_passant:
+            key ^= EP_KEYS[self.en_passant[1]]
+        if en_passant:
+            key ^= EP_KEYS[en_passant[1]]
+        return key
+
+    @property
+    def halfmove(self):
+        return self.halfmoves[-1]
+
+    def set_fen(self, fen):
+        """Nouvelle partie à partir de la position fen, pendules telles qu'elles sont"""
+        self.start_fen = fen
+        self.start_clocks = dict(self.remaining_time)
+        self.board, self.white_to_move, self.can_castle, self.en_passant, halfmove, _ = parse_fen(fen)
+        self.move_history = []
+        self.reset_positions(halfmove)
+
+    def reset_positions(self, halfmove=0):
+        """L'historique des répétitions repart de la position courante (posée à la main)"""
+        self.keys = [self._key()]
+        self.halfmoves = [halfmove]
+        self._status = None
+
+    def pop_position(self):
+        """Retire la dernière position de l'historique des répétitions (coup annulé, board déjà remis).
+        La position d'avant doit y être : GameHistory recharge du journal les positions plus anciennes"""
+        if len(self.keys) < 2:
+            # guessing the key and clock here would silently turn off repetition and fifty-move detection
+            raise IndexError("position d'avant le coup absente de l'historique des répétitions")
+        self.keys.pop()
+        self.halfmoves.pop()
+
+    def repetitions(self):
+        """Occurrences de la position courante, comptées jusqu'au dernier coup irréversible seulement"""
+        keys = self.keys
+        key, last = keys[-1], len(keys) - 1
+        return 1 + sum(keys[i] == key for i in range(last - 4, max(last - self.halfmove, 0) - 1, -2))
+
+    def draw_reason(self):
+        """Nulle réclamable : triple répétition, règle des 50 coups, sinon None"""
+        if self.repetitions() >= 3:
+            return "répétition"
+        if self.halfmove >= 100 and not self.status().checkmate:
+            return "règle des 50 coups"
+        return None
 
     def to_serializable(self):
         return {
@@ -56,7 +216,9 @@ class GameState:
             'en_passant': None if not self.en_passant else list(self.en_passant),
             'move_history': self.move_history,
             'total_time': self.total_time,
-            'remaining_time': self.remaining_time
+            'remaining_time': self.remaining_time,
+            'start_clocks': self.start_clocks,
+            'halfmove': self.halfmove
         }
 
     def load_serializable(self, data):
@@ -67,7 +229,11 @@ class GameState:
         self.move_history = data.get('move_history', [])
         self.total_time = data.get('total_time')
         self.remaining_time = data.get('remaining_time', {'W':0.0,'B':0.0})
+        # former saves hold a game from the start position, with both clocks full then
+        full = float(self.total_time or 0.0)
+        self.start_clocks = data.get('start_clocks', {'W': full, 'B': full})
         self.move_start_time = None
+        self.reset_positions(data.get('halfmove', 0))
 
     def out_of_time(self):
         """Retourne 'W' ou 'B' si un joueur a épuisé son temps, sinon None"""
@@ -0,0 +1,120 @@
+from array import array
+from multiprocessing import shared_memory
+from .board import RC
+
+EXACT, LOWER, UPPER = 0, 1, 2
+ENTRY_BYTES = 16  # 64-bit key + 64-bit packed data; the key slot holds key ^ data so torn writes never match
+
+def encode_move(move):
+    if move is None: return 0
+    (r1,c1),(r2,c2) = move
+    return 1 << 12 | (r1*8+c1) << 6 | (r2*8+c2)
+
+def decode_move(code):
+    if not code: return None
+    return (RC[(code >> 6) & 63], RC[code & 63])
+
+
+class TranspositionTable:
+    """Table de transposition de taille fixe (en Mo), seaux de deux entrées :
+    la première garde la recherche la plus profonde, la seconde est toujours remplacée."""
+
+    def __init__(self, size_mb=16):
+        self.shm = None
+        self.resize(size_mb)
+
+    @classmethod
+    def shared(cls, size_mb=16, name=None):
+        """Table en mémoire partagée (name=None : création, sinon rattachement) pour la recherche parallèle"""
+        tt = cls.__new__(cls)
+        n = max(2, int(size_mb * 1024 * 1024) // ENTRY_BYTES) & ~1
+        if name is None:
+            tt.shm = shared_memory.SharedMemory(create=True, size=n * ENTRY_BYTES)
+            tt.shm.buf[:] = bytes(n * ENTRY_BYTES)
+        else:
+            tt.shm = shared_memory.SharedMemory(name=name)
+        table = tt.shm.buf.cast('Q')
+        tt.keys = table[:n]
+        tt.data = table[n:2*n]
+        tt.size_mb = size_mb
+        tt.buckets = n // 2
+        tt.generation = 0
+        tt.reset_stats()
+        return tt
+
+    def close(self, unlink=False):
+        if self.shm is None:
+            return
+        self.keys.release(); self.data.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+        self.shm = None
+
+    def resize(self, size_mb):
+        n = max(2, int(size_mb * 1024 * 1024) // ENTRY_BYTES) & ~1
+        self.size_mb = size_mb
+        self.keys = array('Q', [0]) * n
+        self.data = array('Q', [0]) * n
+        self.buckets = n // 2
+        self.generation = 0
+        self.reset_stats()
+
+    def clear(self):
+        n = len(self.keys)
+        if self.shm is not None:
+            self.shm.buf[:] = bytes(2 * n * 8)
+        else:
+            self.keys = array('Q', [0]) * n
+            self.data = array('Q', [0]) * n
+        self.generation = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        self.generation = (self.generation + 1) & 63
+
+    def probe(self, key):
+        """Retourne (depth, flag, score, move) ou None"""
+        i = (key % self.buckets) * 2
+        keys, data = self.keys, self.data
+        d = data[i]
+        if keys[i] ^ d != key:
+            i += 1
+            d = data[i]
+            if keys[i] ^ d != key:
+                self.misses += 1
+                return None
+        self.hits += 1
+        return ((d >> 32) & 0xFF) - 1, (d >> 40) & 3, (d & 0xFFFFFFFF) - (1 << 31), decode_move(d >> 48)
+
+    def store(self, key, depth, flag, score, move=None):
+        i = (key % self.buckets) * 2
+        keys, data = self.keys, self.data
+        old = data[i]
+        k = keys[i] ^ old
+        if k != key and old and ((old >> 32) & 0xFF) - 1 > depth and (old >> 42) & 63 == self.generation:
+            i += 1
+        old = data[i]
+        if old and keys[i] ^ old != key:
+            self.overwrites += 1
+        self.stores += 1
+        d = (encode_move(move) << 48 | self.generation << 42 | flag << 40
+             | (depth + 1) << 32 | (score + (1 << 31)) & 0xFFFFFFFF)
+        keys[i] = key ^ d
+        data[i] = d
+
+    def hashfull(self):
+        """Occupation en pour mille, estimée sur les 1000 premières entrées"""
+        sample = self.data[:1000]
+        return sum(1 for d in sample if d) * 1000 // len(sample)
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {'size_mb': self.size_mb, 'entries': len(self.keys), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / probes if probes else 0.0, 'stores': self.stores,
+                'overwrites': self.overwrites, 'hashfull': self.hashfull()}
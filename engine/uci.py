@@ -0,0 +1,213 @@
+"""Interface UCI du moteur (entrée / sortie standard, sans tkinter) pour les gestionnaires de tournoi.
+
+    python -m engine.uci
+    python engine/uci.py          # depuis n'importe quel dossier, pour cutechess-cli et consorts
+
+Commandes : uci, isready, ucinewgame, setoption (Hash, Threads), position startpos|fen ... [moves ...],
+go [depth n] [movetime ms] [wtime ms btime ms winc ms binc ms movestogo n] [infinite] [ponder],
+ponderhit, stop, quit.
+"""
+import os, sys, threading, time
+
+if __package__ in (None, ''):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import ai
+from engine.bitboard import Position
+from engine.board import move_to_uci, uci_to_move
+from engine.fen import parse_fen, START_FEN
+from engine.search import MATE, MATE_BOUND, MAX_DEPTH, principal_variation
+from engine.timecontrol import time_budget, moves_left
+
+NAME = "chess.bite"
+MAX_HASH = 4096
+
+def uci_move(pos, move):
+    """Coup UCI, la promotion (toujours en dame, comme l'IA) ajoutée d'après la pièce jouée"""
+    (r1,c1),(r2,c2) = move
+    promo = 'q' if pos.squares[r1*8+c1] in 'Pp' and r2 in (0, 7) else None
+    return move_to_uci(move, promo)
+
+def uci_score(score, white):
+    """Score de la recherche (point de vue des blancs) -> 'cp x' ou 'mate n' du point de vue du camp au trait"""
+    if not white:
+        score = -score
+    if abs(score) > MATE_BOUND:
+        plies = MATE - abs(score)
+        return f"mate {(plies + 1) // 2 if score > 0 else -((plies + 1) // 2)}"
+    return f"cp {score}"
+
+
+class UCIEngine:
+    """Boucle de commandes ; la recherche tourne dans un thread pour que stop et isready restent servis"""
+
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.lock = threading.Lock()
+        self.threads = 1
+        self.start_fen = START_FEN
+        self.moves = []
+        self.ply = 0
+        self.pos = None
+        self.set_position(START_FEN, [])
+        self.search = None
+        self.last_pv = []
+        self.stop_event = threading.Event()
+        self.ponderhit_event = threading.Event()
+
+    def send(self, line):
+        with self.lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def set_position(self, fen, moves):
+        """Rejoue seulement les coups nouveaux quand la partie prolonge la position précédente ;
+        la position ne change que si tous les coups sont légaux"""
+        if fen != self.start_fen or moves[:len(self.moves)] != self.moves or self.pos is None:
+            board, white, can_castle, en_passant, halfmove, fullmove = parse_fen(fen)
+            pos = Position.from_board(board, white, can_castle, en_passant)
+            pos.halfmove = halfmove
+            played, ply = [], 2 * (fullmove - 1) + (0 if white else 1)
+        else:
+            pos, played, ply = self.pos.copy(), self.moves, self.ply
+        new = moves[len(played):]
+        for s in new:
+            move, promo = uci_to_move(s)
+            if move not in pos.legal_moves() or (promo and promo not in 'qrbn'):
+                raise ValueError(f"coup illégal : {s}")
+            pos.make_move(move, promo)
+        self.pos, self.start_fen, self.moves, self.ply = pos, fen, played + new, ply + len(new)
+
+    def position(self, args):
+        if args and args[0] == 'startpos':
+            fen, rest = START_FEN, args[1:]
+        elif args and args[0] == 'fen':
+            end = args.index('moves') if 'moves' in args else len(args)
+            fen, rest = " ".join(args[1:end]), args[end:]
+        else:
+            raise ValueError("position startpos|fen ... attendu")
+        self.set_position(fen, rest[1:] if rest and rest[0] == 'moves' else [])
+
+    def go(self, args):
+        limits = {}
+        for i, word in enumerate(args):
+            if word in ('depth', 'movetime', 'wtime', 'btime', 'winc', 'binc', 'movestogo') and i + 1 < len(args):
+                limits[word] = int(args[i+1])
+        infinite, ponder = 'infinite' in args, 'ponder' in args
+        pos = self.pos.copy()
+        white = pos.white
+        soft = hard = None
+        if 'movetime' in limits:
+            soft = hard = limits['movetime'] / 1000
+        elif ('wtime' if white else 'btime') in limits and not infinite:
+            remaining = limits['wtime' if white else 'btime'] / 1000
+            increment = limits.get('winc' if white else 'binc', 0) / 1000
+            soft, hard = time_budget(remaining, limits.get('movestogo') or moves_left(self.ply), increment)
+        board, can_castle, en_passant = pos.to_state()
+        self.stop_event.clear()
+        self.ponderhit_event.clear()
+        start = time.perf_counter()
+
+        def on_iteration(depth, score, best, info):
+            pv = principal_variation(pos, info.tt, depth)
+            if not pv or pv[0] != best:
+                pv = [best]
+            elapsed = time.perf_counter() - start
+            moves, undos = [], []
+            for move in pv:
+                moves.append(uci_move(pos, move))
+                undos.append(pos.make_move(move))
+            for undo in reversed(undos):
+                pos.unmake_move(undo)
+            self.send(f"info depth {depth} score {uci_score(score, white)} nodes {info.nodes} "
+                      f"nps {int(info.nodes / elapsed) if elapsed > 0 else 0} time {int(elapsed * 1000)} "
+                      f"pv {' '.join(moves)}")
+            self.last_pv = pv
+
+        game_state = {'board': board, 'white_to_move': white, 'can_castle': can_castle, 'en_passant': en_passant,
+                      'keys': pos.keys, 'halfmove': pos.halfmove, 'time_budget': (soft, hard), 'workers': self.threads,
+                      'cancel': self.stop_event, 'ponder': self.ponderhit_event if ponder else None, 'on_iteration': on_iteration}
+        self.last_pv = []
+
+        def run():
+            move = ai.ai_complex(game_state, depth=limits.get('depth', MAX_DEPTH))
+            # with infinite or ponder the best move waits for stop (or ponderhit)
+            while (infinite or (ponder and not self.ponderhit_event.is_set())) and not self.stop_event.is_set():
+                self.stop_event.wait(0.01)
+            if move is None:
+                self.send("bestmove 0000")
+                return
+            line = f"bestmove {uci_move(pos, move)}"
+            if len(self.last_pv) > 1 and self.last_pv[0] == move:
+                undo = pos.make_move(move)
+                line += f" ponder {uci_move(pos, self.last_pv[1])}"
+                pos.unmake_move(undo)
+            self.send(line)
+
+        self.search = threading.Thread(target=run, daemon=True)
+        self.search.start()
+
+    def wait(self):
+        if self.search is not None:
+            self.search.join()
+            self.search = None
+
+    def stop(self):
+        self.stop_event.set()
+        self.wait()
+
+    def setoption(self, args):
+        words = " ".join(args)
+        name, _, value = words.partition(' value ')
+        name = name.replace('name', '', 1).strip().lower()
+        if name == 'hash':
+            ai.set_hash(max(1, min(MAX_HASH, int(value))))
+        elif name == 'threads':
+            self.threads = max(1, min(os.cpu_count() or 1, int(value)))
+
+    def handle(self, line):
+        """Traite une ligne ; False sur quit"""
+        words = line.split()
+        if not words:
+            return True
+        cmd, args = words[0], words[1:]
+        if cmd == 'uci':
+            self.send(f"id name {NAME}\nid author Waroc, Tom, Marwan, Léo\n"
+                      f"option name Hash type spin default {ai.TT_SIZE_MB} min 1 max {MAX_HASH}\n"
+                      f"option name Threads type spin default 1 min 1 max {os.cpu_count() or 1}\n"
+                      "option name Ponder type check default false\nuciok")
+        elif cmd == 'isready':
+            self.send("readyok")
+        elif cmd == 'ucinewgame':
+            self.stop()
+            ai.clear_hash()
+        elif cmd == 'setoption':
+            self.stop()
+            self.setoption(args)
+        elif cmd == 'position':
+            self.stop()
+            self.position(args)
+        elif cmd == 'go':
+            self.stop()
+            self.go(args)
+        elif cmd == 'ponderhit':
+            self.ponderhit_event.set()
+        elif cmd == 'stop':
+            self.stop()
+        elif cmd == 'quit':
+            self.stop()
+            return False
+        return True
+
+def main():
+    engine = UCIEngine()
+    for line in sys.stdin:
+        try:
+            if not engine.handle(line):
+                break
+        except ValueError as e:
+            engine.send(f"info string {e}")
+    engine.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
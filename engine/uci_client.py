@@ -0,0 +1,308 @@
+"""Sessions UCI persistantes (Stockfish ou autre moteur) et pool de sessions partagé entre parties.
+
+    python -m engine.uci_client --moves 20              # latence : un processus par coup / session réutilisée
+    python -m engine.uci_client --engine stockfish      # même mesure avec un vrai moteur
+    python -m engine.uci_client --check                 # vérifications contre le faux moteur engine.fake_uci
+"""
+import argparse, os, queue, subprocess, sys, tempfile, threading, time
+from contextlib import contextmanager
+
+GRACE = 5.0   # seconds allowed on top of the requested thinking time before sending "stop"
+
+
+class UCIError(Exception):
+    pass
+
+
+class UCISession:
+    """Un processus moteur lancé une fois : poignée de main uci/isready, puis ucinewgame/position/go à chaque coup"""
+
+    def __init__(self, command, options=None, timeout=10.0):
+        if isinstance(command, str):
+            command = [command]
+        self.command = command
+        try:
+            self.proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        except OSError as e:
+            raise UCIError(f"impossible de lancer {command}: {e}")
+        self.lines = queue.Queue()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+        self.name = None
+        self.game_id = None
+        self.searches = 0
+        self.send("uci")
+        self.wait_for("uciok", timeout)
+        for name, value in (options or {}).items():
+            self.send(f"setoption name {name} value {value}")
+        self.sync(timeout)
+
+    def _read_loop(self):
+        for line in self.proc.stdout:
+            self.lines.put(line.strip())
+        self.lines.put(None)
+
+    @property
+    def alive(self):
+        return self.proc.poll() is None
+
+    def send(self, command):
+        try:
+            self.proc.stdin.write(command + "\n")
+            self.proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise UCIError(f"moteur injoignable: {e}")
+
+    def wait_for(self, keyword, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise UCIError(f"pas de '{keyword}' après {timeout:.1f}s")
+            try:
+                line = self.lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                raise UCIError("le moteur s'est arrêté")
+            if line.startswith("id name "):
+                self.name = line[8:]
+            if line.split(" ", 1)[0] == keyword:
+                return line
+
+    def sync(self, timeout=10.0):
+        self.send("isready")
+        self.wait_for("readyok", timeout)
+
+    def new_game(self, game_id=None):
+        self.send("ucinewgame")
+        self.sync()
+        self.game_id = game_id
+
+    def go(self, moves=None, fen=None, movetime=None, wtime=None, btime=None, winc=0, binc=0, depth=None):
+        """Envoie la position puis go, et retourne le coup 'bestmove' (chaîne UCI) ou None"""
+        position = f"position fen {fen}" if fen else "position startpos"
+        if moves:
+            position += " moves " + " ".join(moves)
+        self.send(position)
+        if wtime is not None and btime is not None:
+            self.send(f"go wtime {int(wtime*1000)} btime {int(btime*1000)} winc {int(winc*1000)} binc {int(binc*1000)}")
+            budget = max(wtime, btime)
+        elif depth is not None:
+            self.send(f"go depth {depth}")
+            budget = 60.0
+        else:
+            movetime = 0.1 if movetime is None else movetime
+            self.send(f"go movetime {max(1, int(movetime*1000))}")
+            budget = movetime
+        self.searches += 1
+        try:
+            line = self.wait_for("bestmove", budget + GRACE)
+        except UCIError:
+            if not self.alive:
+                raise
+            self.send("stop")
+            line = self.wait_for("bestmove", GRACE)
+        parts = line.split()
+        if len(parts) < 2 or parts[1] in ("(none)", "0000"):
+            return None
+        return parts[1]
+
+    def close(self):
+        if self.alive:
+            try:
+                self.send("quit")
+                self.proc.wait(timeout=1.0)
+            except (UCIError, subprocess.TimeoutExpired):
+                self.proc.kill()
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try: stream.close()
+            except OSError: pass
+
+
+class EnginePool:
+    """Petit pool de sessions : une partie retrouve de préférence la session qui connaît déjà ses coups,
+    sinon elle prend la session libre la plus ancienne (avec ucinewgame)"""
+
+    def __init__(self, command, size=1, options=None):
+        self.command = command
+        self.size = size
+        self.options = options or {}
+        self.sessions = []
+        self.idle = []
+        self._cond = threading.Condition()
+        self.started = 0
+        self.starting = 0   # sessions being spawned outside the lock, counted against size
+
+    def acquire(self, game_id=None, timeout=None):
+        with self._cond:
+            while True:
+                for s in self.idle:
+                    if s.game_id == game_id and game_id is not None:
+                        self.idle.remove(s)
+                        return s
+                if len(self.sessions) + self.starting < self.size:
+                    self.starting += 1
+                    s = None
+                    break
+                if self.idle:
+                    s = self.idle.pop(0)
+                    break
+                if not self._cond.wait(timeout):
+                    raise UCIError("aucune session libre")
+        # spawning the process and the handshakes happen outside the lock: the other callers are not held up
+        if s is None:
+            try:
+                s = UCISession(self.command, self.options)
+            finally:
+                with self._cond:
+                    self.starting -= 1
+                    if s is not None:
+                        self.sessions.append(s)
+                        self.started += 1
+                    self._cond.notify()
+        s.new_game(game_id)
+        return s
+
+    def release(self, session):
+        with self._cond:
+            if session.alive:
+                self.idle.append(session)
+            else:
+                session.close()
+                if session in self.sessions:
+                    self.sessions.remove(session)
+            self._cond.notify()
+
+    def discard(self, session):
+        session.close()
+        with self._cond:
+            if session in self.sessions:
+                self.sessions.remove(session)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, game_id=None):
+        s = self.acquire(game_id)
+        try:
+            yield s
+        except BaseException:
+            # engine error, bad reply or interruption: the session may be mid-search, it is not reused
+            self.discard(s)
+            raise
+        else:
+            self.release(s)
+
+    def close(self):
+        with self._cond:
+            for s in self.sessions:
+                s.close()
+            self.sessions = []
+            self.idle = []
+
+
+def _latency_bench(command, n_moves, movetime):
+    from .bitboard import Position
+    from .board import START_BOARD, uci_to_move
+    from .fen import board_to_fen
+
+    def play(get_move):
+        pos = Position.from_board(START_BOARD, True, {'K':True,'Q':True,'k':True,'q':True}, None)
+        moves = []
+        times = []
+        for _ in range(n_moves):
+            t0 = time.perf_counter()
+            best = get_move(moves, pos)
+            times.append(time.perf_counter() - t0)
+            if best is None:
+                break
+            move, promo = uci_to_move(best)
+            pos.make_move(move, promo)
+            moves.append(best)
+        return times
+
+    def spawn_each_time(moves, pos):
+        s = UCISession(command)
+        try:
+            board, can_castle, en_passant = pos.to_state()
+            return s.go(fen=board_to_fen(board, pos.white, can_castle, en_passant), movetime=movetime)
+        finally:
+            s.close()
+
+    pool = EnginePool(command, size=1)
+    def pooled(moves, pos):
+        with pool.session("bench") as s:
+            return s.go(moves=moves, movetime=movetime)
+
+    for label, fn in (("un processus par coup", spawn_each_time), ("session persistante", pooled)):
+        times = play(fn)
+        avg = sum(times) / len(times) if times else 0.0
+        print(f"{label:<22} {len(times)} coups  moyenne {avg*1000:7.1f} ms  max {max(times)*1000:7.1f} ms")
+    print(f"processus lancés par le pool : {pool.started}")
+    pool.close()
+
+def _check():
+    """stockfish_bestmove contre engine.fake_uci : un seul processus pour plusieurs parties, ucinewgame et
+    position ... moves envoyés comme il faut, promotion rendue à la casse du camp au trait"""
+    from .ai import stockfish_bestmove
+    from .board import START_BOARD
+    from .fake_uci import COMMAND
+    from .fen import parse_fen
+
+    def game_state(game_id, fen=None, moves=None):
+        board, white, can_castle, en_passant, _, _ = parse_fen(fen) if fen else (START_BOARD, True, None, None, 0, 1)
+        return {'board': board, 'white_to_move': white, 'can_castle': can_castle or {'K':True,'Q':True,'k':True,'q':True},
+                'en_passant': en_passant, 'moves': moves, 'game_id': game_id}
+
+    fd, log_path = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    pool = EnginePool(COMMAND + ["--promote", "n", "--log", log_path], size=1)
+    try:
+        first = stockfish_bestmove(game_state(1, moves=[]), think_time=0.01, pool=pool)
+        pid = pool.sessions[0].proc.pid
+        stockfish_bestmove(game_state(1, "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2",
+                                      moves=['e2e4', 'e7e5']), think_time=0.01, pool=pool)
+        white = stockfish_bestmove(game_state(2, fen="8/4P3/8/8/8/8/k7/7K w - - 0 1"), think_time=0.01, pool=pool)
+        black = stockfish_bestmove(game_state(3, fen="7k/8/8/8/8/8/4p3/K7 b - - 0 1"), think_time=0.01, pool=pool)
+        same_process = pool.started == 1 and pool.sessions[0].proc.pid == pid
+    finally:
+        pool.close()
+    with open(log_path, encoding='utf-8') as f:
+        sent = [line.strip() for line in f if line.split()[0] in ('ucinewgame', 'position')]
+    os.remove(log_path)
+    checks = [
+        ("un processus pour toutes les parties", same_process),
+        ("ucinewgame à chaque nouvelle partie seulement", sent == [
+            "ucinewgame", "position startpos",
+            "position startpos moves e2e4 e7e5",
+            "ucinewgame", "position fen 8/4P3/8/8/8/8/k7/7K w - - 0 1",
+            "ucinewgame", "position fen 7k/8/8/8/8/8/4p3/K7 b - - 0 1"]),
+        ("premier coup rendu en (coup, None)", first is not None and first[1] is None),
+        ("promotion des Blancs en majuscule", white == (((1,4),(0,4)), 'N')),
+        ("promotion des Noirs en minuscule", black == (((6,4),(7,4)), 'n')),
+    ]
+    for label, ok in checks:
+        print(f"{label:<46} {'OK' if ok else 'ÉCHEC'}")
+    return 0 if all(ok for _, ok in checks) else 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latence des sessions UCI")
+    parser.add_argument('--engine', help="commande du moteur (défaut : faux moteur engine.fake_uci)")
+    parser.add_argument('--moves', type=int, default=20)
+    parser.add_argument('--movetime', type=float, default=0.05, help="secondes par coup")
+    parser.add_argument('--startup', type=float, default=0.3, help="délai de démarrage simulé du faux moteur")
+    parser.add_argument('--check', action='store_true', help="vérifie stockfish_bestmove contre le faux moteur")
+    args = parser.parse_args(argv)
+    if args.check:
+        return _check()
+    if args.engine:
+        command = [args.engine]
+    else:
+        from .fake_uci import COMMAND
+        command = COMMAND + ["--startup", str(args.startup)]
+    _latency_bench(command, args.moves, args.movetime)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import atexit, multiprocessing, queue, threading, traceback
+
+class _Counter:
+    def __init__(self):
+        self.value = 0
+
+
+class JobFlag:
+    """Drapeau d'une requête vu par la recherche (annulation, coup prévu joué) : levé dès que
+    le compteur partagé atteint son numéro"""
+
+    def __init__(self, job_id, counter):
+        self.job_id = job_id
+        self.counter = counter
+
+    def is_set(self):
+        return self.counter.value >= self.job_id
+
+def _worker_loop(requests, results, cancelled_upto, ponderhit_upto):
+    from .ai import AI_BY_NAME, PONDER_LEVELS, expected_reply
+    while True:
+        job = requests.get()
+        if job is None:
+            break
+        job_id, level, game_state, ponder = job
+        if cancelled_upto.value >= job_id:
+            results.put((job_id, None, None, None))
+            continue
+        game_state['cancel'] = JobFlag(job_id, cancelled_upto)
+        if ponder:
+            game_state['ponder'] = JobFlag(job_id, ponderhit_upto)
+        ai_func = AI_BY_NAME.get(level, list(AI_BY_NAME.values())[0])
+        try:
+            move = ai_func(game_state)
+            reply = expected_reply(game_state, move) if move and level in PONDER_LEVELS else None
+        except Exception:
+            # the empty result is resubmitted by the UI: without the traceback the AI would just look stuck
+            traceback.print_exc()
+            move = reply = None
+        results.put((job_id, move, reply, game_state.get('promotion')))
+
+
+class AIWorker:
+    """Calcule les coups de l'IA hors du thread Tk, dans un processus (pas de GIL partagé avec l'interface)
+    ou un thread. Une seule recherche utile à la fois : submit() annule la précédente.
+    Une recherche lancée avec ponder=True (coup adverse supposé déjà joué) ne compte pas son temps
+    avant ponderhit()."""
+
+    def __init__(self, use_process=True):
+        self.use_process = use_process
+        self.job_id = 0
+        self.pending = None
+        self._started = False
+
+    def _start(self):
+        if self.use_process:
+            ctx = multiprocessing.get_context('spawn')
+            self.requests = ctx.Queue()
+            self.results = ctx.Queue()
+            self.cancelled_upto = ctx.RawValue('q', 0)
+            self.ponderhit_upto = ctx.RawValue('q', 0)
+            # not a daemon: the search may start its own helper processes (engine.parallel)
+            self.runner = ctx.Process(target=_worker_loop, args=(self.requests, self.results, self.cancelled_upto, self.ponderhit_upto))
+            atexit.register(self.close)
+        else:
+            self.requests = queue.Queue()
+            self.results = queue.Queue()
+            self.cancelled_upto = _Counter()
+            self.ponderhit_upto = _Counter()
+            self.runner = threading.Thread(target=_worker_loop, args=(self.requests, self.results, self.cancelled_upto, self.ponderhit_upto), daemon=True)
+        self.runner.start()
+        self._started = True
+
+    @property
+    def busy(self):
+        return self.pending is not None
+
+    def submit(self, level, game_state, ponder=False):
+        """Lance la recherche et retourne son numéro ; le résultat arrive par poll()"""
+        if not self._started:
+            self._start()
+        self.cancel()
+        self.job_id += 1
+        state = dict(game_state)
+        state['board'] = [row[:] for row in state['board']]
+        self.pending = self.job_id
+        self.requests.put((self.job_id, level, state, ponder))
+        return self.job_id
+
+    def cancel(self):
+        if self.pending is not None:
+            self.cancelled_upto.value = self.pending
+            self.pending = None
+
+    def ponderhit(self):
+        if self.pending is not None:
+            self.ponderhit_upto.value = self.pending
+
+    def poll(self):
+        """(job_id, coup, réponse attendue, promotion) de la recherche en cours si elle est terminée, sinon None ;
+        les résultats annulés sont ignorés"""
+        if not self._started:
+            return None
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            if result[0] == self.pending:
+                self.pending = None
+                return result
+
+    def close(self):
+        if not self._started:
+            return
+        self.cancel()
+        self.requests.put(None)
+        self._started = False
@@ -0,0 +1,30 @@
+import random
+
+# fixed seed: keys must be identical from one run to the next (saved tables, books)
+_rng = random.Random(20250101)
+
+PIECE_KEYS = {p: [_rng.getrandbits(64) for _ in range(64)] for p in "PNBRQKpnbrqk"}
+SIDE_KEY = _rng.getrandbits(64)
+_CASTLE_RIGHT_KEYS = [_rng.getrandbits(64) for _ in range(4)]
+EP_KEYS = [_rng.getrandbits(64) for _ in range(8)]
+
+# CASTLE_KEYS[mask] for the 16 combinations of the K/Q/k/q bits of Position.castle
+CASTLE_KEYS = []
+for _mask in range(16):
+    _k = 0
+    for _i in range(4):
+        if _mask & (1 << _i): _k ^= _CASTLE_RIGHT_KEYS[_i]
+    CASTLE_KEYS.append(_k)
+
+def compute_key(pos):
+    """Recalcule la clé complète d'une Position (contrôle de la clé incrémentale)"""
+    key = 0
+    for s, p in enumerate(pos.squares):
+        if p != '.':
+            key ^= PIECE_KEYS[p][s]
+    if not pos.white:
+        key ^= SIDE_KEY
+    key ^= CASTLE_KEYS[pos.castle]
+    if pos.ep is not None:
+        key ^= EP_KEYS[pos.ep & 7]
+    return key
@@ -3,25 +3,29 @@ from tkinter import messagebox, filedialog, simpledialog
 import time, json
 
 from engine.timecontrol import GameState
-from engine.movegen import legal_moves, is_checkmate, is_stalemate, in_check
-from engine.ai import AI_BY_NAME
+from engine.worker import AIWorker
+from engine.journal import GameJournal, is_journal
+from engine.history import GameHistory
+from engine.pgn import write_game_state
 from engine.board import UNICODE, FILES, BOARD_SIZE, SQUARE, WHITE_COLOR, BLACK_COLOR, HIGHLIGHT_COLOR, MOVE_MARK_COLOR, SELECT_BORDER
-# ----- AJOUTS IMPORTANTS-----
-from engine.pile_liste import Liste_chaine, Pile_LIFO
-# ----------------------------
+
+AI_POLL_MS = 30   # intervalle de relève du résultat de l'IA
 
 class ChessGUI:
-    def __init__(self, root, vs_ai=False, ai_level='Facile', total_time=None):
+    def __init__(self, root, vs_ai=False, ai_level='Facile', total_time=None, ponder=True):
         self.root = root
         self.root.title("Échecs - Projet Terminale NSI")
         self.vs_ai = vs_ai
         self.ai_level = ai_level
         self.game_over = False
         self.state = GameState(vs_ai=vs_ai, ai_level=ai_level, total_time=total_time)
+        self.ai_worker = AIWorker()
+        self.ponder = ponder
+        self.ponder_move = None     # reply the AI is pondering on
+        self.ponder_result = None   # its search result, kept until the human actually plays that reply
+        self.journal = None         # GameJournal the moves are appended to, once the game has been saved
         # ----- AJOUTS IMPORTANTS-----
-        self.history = Pile_LIFO()
-        self.positions = Liste_chaine()
-        self.positions.append([row[:] for row in self.state.board])
+        self.history = GameHistory()   # undo / redo records of the moves of self.state
         # ----------------------------
 
         self.canvas = tk.Canvas(root, width=BOARD_SIZE*SQUARE, height=BOARD_SIZE*SQUARE)
@@ -42,65 +46,182 @@ class ChessGUI:
         tk.Button(btn_frame, text="Nouveau", command=self.new_game).grid(row=0,column=0,padx=4)
         tk.Button(btn_frame, text="Sauvegarder", command=self.save_game).grid(row=0,column=1,padx=4)
         tk.Button(btn_frame, text="Charger", command=self.load_game).grid(row=0,column=2,padx=4)
-        tk.Button(btn_frame, text="Annuler dernier", command=self.undo_last).grid(row=1,column=0,columnspan=3,pady=6)
+        tk.Button(btn_frame, text="Annuler dernier", command=self.undo_last).grid(row=1,column=0,columnspan=2,pady=6)
+        tk.Button(btn_frame, text="Rétablir", command=self.redo_next).grid(row=1,column=2,pady=6)
+        tk.Button(btn_frame, text="Exporter PGN", command=self.export_pgn).grid(row=2,column=0,columnspan=3)
         self.move_log = tk.Text(self.info_frame, width=30, height=20)
         self.move_log.pack(pady=8)
+        self.move_log.tag_config('undone', foreground='gray')
+        self.move_log.bind("<Double-Button-1>", self.on_log_double_click)
         self.canvas.bind("<Button-1>", self.on_click)
         self.selected = None
         self.legal_targets = []
         self.state.start_time = time.time()
         self.state.move_start_time = time.time()
+        self._build_board()
         self.draw_board()
-        self.update_ui()
+        self.refresh_panel()
         self.root.after(200, self._tick)
-        # ----- AJOUTS IMPORTANTS-----
-        self.history = Pile_LIFO()
-        self.positions = Liste_chaine()
-        # ----------------------------
 
-    def draw_board(self):
-        self.canvas.delete("all")
+    def _build_board(self):
+        """Items du plateau créés une fois : cases, cadre de sélection, marques de coups, pièces, coordonnées.
+        draw_board ne fait ensuite que les modifier."""
         for r in range(8):
             for c in range(8):
                 x1 = c*SQUARE; y1 = r*SQUARE
                 color = WHITE_COLOR if (r+c)%2==0 else BLACK_COLOR
                 self.canvas.create_rectangle(x1,y1,x1+SQUARE,y1+SQUARE, fill=color, outline=color)
-        if self.selected:
-            r,c = self.selected
-            x1 = c*SQUARE; y1 = r*SQUARE
-            self.canvas.create_rectangle(x1,y1,x1+SQUARE,y1+SQUARE, outline=SELECT_BORDER, width=3)
-            for (rr,cc) in self.legal_targets:
-                cx = cc*SQUARE + SQUARE//2; cy = rr*SQUARE + SQUARE//2
-                if self.state.board[rr][cc] != '.':
-                    self.canvas.create_oval(cx-18,cy-18,cx+18,cy+18, outline=MOVE_MARK_COLOR, width=3)
-                else:
-                    self.canvas.create_oval(cx-8,cy-8,cx+8,cy+8, fill=MOVE_MARK_COLOR, outline='')
+        self.select_item = self.canvas.create_rectangle(0,0,SQUARE,SQUARE, outline=SELECT_BORDER, width=3, state='hidden')
+        self.dot_items = [[None]*8 for _ in range(8)]
+        self.ring_items = [[None]*8 for _ in range(8)]
+        self.piece_items = [[None]*8 for _ in range(8)]
         for r in range(8):
             for c in range(8):
-                p = self.state.board[r][c]
-                if p!='.':
-                    x = c*SQUARE + SQUARE//2; y = r*SQUARE + SQUARE//2
-                    self.canvas.create_text(x,y, text=UNICODE[p], font=("DejaVu Sans", int(SQUARE*0.5)))
+                cx = c*SQUARE + SQUARE//2; cy = r*SQUARE + SQUARE//2
+                self.ring_items[r][c] = self.canvas.create_oval(cx-18,cy-18,cx+18,cy+18, outline=MOVE_MARK_COLOR, width=3, state='hidden')
+                self.dot_items[r][c] = self.canvas.create_oval(cx-8,cy-8,cx+8,cy+8, fill=MOVE_MARK_COLOR, outline='', state='hidden')
+        for r in range(8):
+            for c in range(8):
+                x = c*SQUARE + SQUARE//2; y = r*SQUARE + SQUARE//2
+                self.piece_items[r][c] = self.canvas.create_text(x,y, text='', font=("DejaVu Sans", int(SQUARE*0.5)))
         for c in range(8):
             self.canvas.create_text(c*SQUARE+10, BOARD_SIZE*SQUARE-8, text=FILES[c], anchor='w', font=("Helvetica",8))
         for r in range(8):
             self.canvas.create_text(4, r*SQUARE+8, text=str(8-r), anchor='w', font=("Helvetica",8))
+        self.drawn = [['.']*8 for _ in range(8)]   # piece shown on each square
+        self.drawn_marks = []                      # items of the move marks currently shown
+        self.drawn_selected = None
+
+    def draw_board(self):
+        # only the squares whose piece changed are touched; selection and marks are shown / hidden
+        board = self.state.board
+        for r in range(8):
+            row, drawn = board[r], self.drawn[r]
+            for c in range(8):
+                if row[c] != drawn[c]:
+                    drawn[c] = row[c]
+                    self.canvas.itemconfigure(self.piece_items[r][c], text=UNICODE[row[c]] if row[c] != '.' else '')
+        if self.selected != self.drawn_selected:
+            if self.selected:
+                r,c = self.selected
+                self.canvas.coords(self.select_item, c*SQUARE, r*SQUARE, c*SQUARE+SQUARE, r*SQUARE+SQUARE)
+                self.canvas.itemconfigure(self.select_item, state='normal')
+            else:
+                self.canvas.itemconfigure(self.select_item, state='hidden')
+            self.drawn_selected = self.selected
+        marks = []
+        if self.selected:
+            marks = [(self.ring_items if board[rr][cc] != '.' else self.dot_items)[rr][cc] for (rr,cc) in self.legal_targets]
+        if marks != self.drawn_marks:
+            for item in self.drawn_marks:
+                self.canvas.itemconfigure(item, state='hidden')
+            for item in marks:
+                self.canvas.itemconfigure(item, state='normal')
+            self.drawn_marks = marks
 
     def _tick(self):
-        self.update_ui()
-        if self.state.vs_ai and not self.state.white_to_move:
-            self.root.after(50, self._ai_move)
+        self.update_clocks()
+        if self.state.vs_ai and not self.state.white_to_move and not self.game_over and self.ponder_result is None:
+            self._start_ai_search()
         self.root.after(200, self._tick)
 
-    def update_ui(self):
-        if self.game_over:
+    def _start_ai_search(self):
+        # une seule recherche en cours par partie : les ticks suivants n'en relancent pas
+        if self.ai_worker.busy:
+            return
+        job = self.ai_worker.submit(self.ai_level, self.state.ai_state())
+        self.root.after(AI_POLL_MS, self._poll_ai, job)
+
+    def _poll_ai(self, job):
+        if self.ai_worker.pending != job:
+            return   # annulée (nouvelle partie, chargement, annulation de coup)
+        result = self.ai_worker.poll()
+        if result is None:
+            self.root.after(AI_POLL_MS, self._poll_ai, job)
+            return
+        if self.ponder_move is not None:
+            self.ponder_result = result   # finished before the human moved
+            return
+        self._ai_move(result[1], result[2], result[3])
+
+    def _start_ponder(self, reply):
+        # the AI keeps searching on the human's time, assuming the reply it expects
+        self.ponder_move = reply
+        self.ponder_result = None
+        job = self.ai_worker.submit(self.ai_level, self.state.ponder_state(reply), ponder=True)
+        self.root.after(AI_POLL_MS, self._poll_ai, job)
+
+    def _check_ponder(self, move, promote_to):
+        """Coup prévu : la réflexion anticipée devient la recherche du coup ; sinon elle est abandonnée
+        (la table de transposition du worker est conservée)"""
+        if self.ponder_move is None:
             return
+        if self.game_over or move != self.ponder_move or (promote_to or 'Q').upper() != 'Q':
+            self.cancel_ai()
+            return
+        self.ponder_move = None
+        if self.ponder_result is not None:
+            self.root.after(0, self._play_ponder_result)
+        else:
+            self.ai_worker.ponderhit()
+
+    def _play_ponder_result(self):
+        result, self.ponder_result = self.ponder_result, None
+        if result is not None:
+            self._ai_move(result[1], result[2], result[3])
 
+    def cancel_ai(self):
+        self.ai_worker.cancel()
+        self.ponder_move = None
+        self.ponder_result = None
+
+    def refresh_panel(self):
+        """Panneau reconstruit en entier (ouverture, nouvelle partie, chargement) : journal, statut, pendules"""
+        self.move_log.delete(1.0, tk.END)
+        for i, move in enumerate(self.state.move_history, start=1):
+            self.move_log.insert(tk.END, self._log_line(i, move))
+        self.clock_text = None
+        self.update_status()
+        self.update_clocks()
+
+    def _log_line(self, i, move):
+        return f"{i}. {move.get('algebraic','')}  {move.get('time',0.0):.2f}s\n"
+
+    def log_move(self):
+        """Coup ajouté à move_history : une ligne de plus au journal (les coups annulés en gris disparaissent)
+        et le statut de la nouvelle position"""
+        n = len(self.state.move_history)
+        self.move_log.delete(f"{n}.0", tk.END)
+        self.move_log.insert(tk.END, self._log_line(n, self.state.move_history[-1]))
+        self.update_status()
+
+    def show_undone(self):
+        """Après annulation ou rétablissement : les lignes au-delà de move_history passent en gris
+        (le texte reste, un double-clic y revient)"""
+        self.move_log.tag_remove('undone', 1.0, tk.END)
+        self.move_log.tag_add('undone', f"{len(self.state.move_history)+1}.0", tk.END)
+        self.update_status()
+        self.clock_text = None
+        self.update_clocks()
+
+    def update_status(self):
+        # once per position: side to move, check and last move
         side = "Blancs" if self.state.white_to_move else "Noirs"
         status = f"À jouer : {side}"
-        if in_check(self.state.board, self.state.white_to_move):
+        if self.state.status().check:
             status += " — ÉCHEC !"
         self.status_var.set(status)
+        if self.state.move_history:
+            last = self.state.move_history[-1]
+            mv_str = f"{last.get('player','?')}: {last.get('algebraic','?')} ({last.get('time',0.0):.2f}s)"
+            self.lbl_last_move.config(text="Dernier coup: " + mv_str)
+        else:
+            self.lbl_last_move.config(text="Dernier coup: -")
+
+    def update_clocks(self):
+        # called by _tick; the labels show whole seconds, so they are only reconfigured when that text changes
+        if self.game_over:
+            return
 
         now = time.time()
         move_elapsed = now - (self.state.move_start_time or now)
@@ -121,8 +242,7 @@ class ChessGUI:
                 b_display = fmt(b_remain - move_elapsed)
                 w_display = fmt(w_remain)
 
-            self.lbl_white_total.config(text=f"⏱ Blancs restant : {w_display}")
-            self.lbl_black_total.config(text=f"⏱ Noirs restant : {b_display}")
+            self._set_clocks(f"⏱ Blancs restant : {w_display}", f"⏱ Noirs restant : {b_display}")
 
             if self.state.white_to_move and (w_remain - move_elapsed) <= 0:
                 from tkinter import messagebox
@@ -140,19 +260,13 @@ class ChessGUI:
         else:
             white_total = self.state.remaining_time['W'] + (move_elapsed if self.state.white_to_move else 0)
             black_total = self.state.remaining_time['B'] + (move_elapsed if not self.state.white_to_move else 0)
-            self.lbl_white_total.config(text=f"⏱ Blancs temps : {fmt(white_total)}")
-            self.lbl_black_total.config(text=f"⏱ Noirs temps : {fmt(black_total)}")
+            self._set_clocks(f"⏱ Blancs temps : {fmt(white_total)}", f"⏱ Noirs temps : {fmt(black_total)}")
 
-        if self.state.move_history:
-            last = self.state.move_history[-1]
-            mv_str = f"{last.get('player','?')}: {last.get('algebraic','?')} ({last.get('time',0.0):.2f}s)"
-            self.lbl_last_move.config(text="Dernier coup: " + mv_str)
-        else:
-            self.lbl_last_move.config(text="Dernier coup: -")
-
-        self.move_log.delete(1.0, tk.END)
-        for i, move in enumerate(self.state.move_history, start=1):
-            self.move_log.insert(tk.END, f"{i}. {move.get('algebraic','')}  {move.get('time',0.0):.2f}s\n")
+    def _set_clocks(self, white_text, black_text):
+        if (white_text, black_text) != self.clock_text:
+            self.clock_text = (white_text, black_text)
+            self.lbl_white_total.config(text=white_text)
+            self.lbl_black_total.config(text=black_text)
 
     def on_click(self, event):
         c = event.x // SQUARE; r = event.y // SQUARE
@@ -165,8 +279,7 @@ class ChessGUI:
             if p=='.': return
             if p.isupper() != self.state.white_to_move: return
             self.selected = (r,c)
-            self.legal_targets = legal_moves(self.state.board, self.state.white_to_move, self.state.can_castle, self.state.en_passant)
-            self.legal_targets = [m[1] for m in self.legal_targets if m[0]==(r,c)]
+            self.legal_targets = self.state.status().targets(r, c)
             self.draw_board()
             return
         if self.selected == (r,c):
@@ -182,37 +295,29 @@ class ChessGUI:
                 promote_choice = self.ask_promotion(moving_piece.isupper())
             now = time.time()
             dt = now - (self.state.move_start_time or now)
-            alg = f"{self.idx_to_alg(self.selected[0],self.selected[1])}{self.idx_to_alg(r,c)}"
-            self.state.apply_move(move, promote_to=promote_choice)
             # ----- AJOUTS IMPORTANTS-----
-            self.history.push(move)
-            self.positions.append([row[:] for row in self.state.board])
+            self.history.play(self.state, move, promote_choice, dt)
             # ----------------------------
-            player = 'W' if not self.state.white_to_move else 'B'
-            if self.state.total_time:
-                self.state.remaining_time[player] -= dt
-                if self.state.remaining_time[player] < 0:
-                    self.state.remaining_time[player] = 0
-            else:
-                self.state.remaining_time[player] += dt
-            hist = {'move': ((self.selected),(r,c)), 'algebraic': alg, 'time': dt, 'player': player}
-            self.state.move_history.append(hist)
             self.selected = None
             self.legal_targets=[]
             self.state.move_start_time = time.time()
             self.draw_board()
-            self.update_ui()
-            if is_checkmate(self.state.board, self.state.white_to_move, self.state.can_castle, self.state.en_passant):
+            self.log_move()
+            if self.state.status().checkmate:
                 winner = "Blancs" if not self.state.white_to_move else "Noirs"
                 self.game_over = True
                 messagebox.showinfo("Fin de partie", f"Échec et mat ! {winner} gagnent.")
-            elif is_stalemate(self.state.board, self.state.white_to_move, self.state.can_castle, self.state.en_passant):
+            elif self.state.status().stalemate:
                 self.game_over = True
                 messagebox.showinfo("Fin de partie", "Pat ! (égalité)")
+            elif self.state.draw_reason():
+                self.game_over = True
+                messagebox.showinfo("Fin de partie", f"Partie nulle ({self.state.draw_reason()}).")
+            self._check_ponder(move, promote_choice)
             return
         if p!='.' and p.isupper() == self.state.white_to_move:
             self.selected=(r,c)
-            self.legal_targets = [m[1] for m in legal_moves(self.state.board, self.state.white_to_move, self.state.can_castle, self.state.en_passant) if m[0]==(r,c)]
+            self.legal_targets = self.state.status().targets(r, c)
             self.draw_board()
             return
         self.selected=None; self.legal_targets=[]; self.draw_board()
@@ -237,88 +342,117 @@ class ChessGUI:
     def new_game(self):
         if not messagebox.askyesno("Nouveau", "Commencer une nouvelle partie ?"):
             return
+        self.cancel_ai()
+        self.close_journal()
+        self.game_over = False
         self.state = GameState(vs_ai=self.vs_ai, ai_level=self.ai_level)
+        self.history = GameHistory()
         self.selected = None
         self.legal_targets = []
         self.state.start_time = time.time()
         self.state.move_start_time = time.time()
         self.draw_board()
-        self.update_ui()
+        self.refresh_panel()
 
     def save_game(self):
-        fn = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON","*.json")])
+        # journal: the game so far now, then every move appended as it is played
+        fn = filedialog.asksaveasfilename(defaultextension=".cbj", filetypes=[("Journal de partie","*.cbj")])
         if not fn: return
-        data = {
-            'state': self.state.to_serializable(),
-            'vs_ai': self.vs_ai,
-            'ai_level': self.ai_level
-        }
         try:
-            with open(fn,'w',encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            messagebox.showinfo("Sauvegarde", f"Partie sauvegardée dans\n{fn}")
+            self.close_journal()
+            self.journal = self.history.journal = GameJournal.create(fn, self.state, self.vs_ai, self.ai_level)
+            messagebox.showinfo("Sauvegarde", f"Partie sauvegardée dans\n{fn}\nLes coups suivants y seront ajoutés au fil de la partie.")
         except Exception as e:
             messagebox.showerror("Erreur", f"Impossible de sauvegarder :\n{e}")
 
+    def export_pgn(self):
+        fn = filedialog.asksaveasfilename(defaultextension=".pgn", filetypes=[("PGN","*.pgn")])
+        if not fn: return
+        try:
+            with open(fn,'w',encoding='utf-8') as f:
+                write_game_state(f, self.state)
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Impossible d'exporter :\n{e}")
+
+    def close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = self.history.journal = None
+
     def load_game(self):
-        fn = filedialog.askopenfilename(filetypes=[("JSON","*.json")])
+        fn = filedialog.askopenfilename(filetypes=[("Parties","*.cbj *.json"), ("Journal de partie","*.cbj"), ("JSON","*.json")])
         if not fn: return
         try:
-            with open(fn,'r',encoding='utf-8') as f:
-                data = json.load(f)
-            state_data = data['state']
-            self.vs_ai = data.get('vs_ai', False)
-            self.ai_level = data.get('ai_level', 'Facile')
-            self.state = GameState(vs_ai=self.vs_ai, ai_level=self.ai_level)
-            self.state.load_serializable(state_data)
+            if is_journal(fn):
+                journal = GameJournal.open(fn)
+                self.cancel_ai()
+                self.vs_ai, self.ai_level = journal.vs_ai, journal.ai_level
+                # last checkpoint only: older moves get their undo records when they are undone
+                self.state, history = GameHistory.from_journal(journal)
+            else:
+                # former JSON saves (save/*.json): no undo before the position they hold
+                history = GameHistory()
+                with open(fn,'r',encoding='utf-8') as f:
+                    data = json.load(f)
+                state_data = data['state']
+                journal = None
+                self.cancel_ai()
+                self.vs_ai = data.get('vs_ai', False)
+                self.ai_level = data.get('ai_level', 'Facile')
+                self.state = GameState(vs_ai=self.vs_ai, ai_level=self.ai_level)
+                self.state.load_serializable(state_data)
+            self.close_journal()
+            self.journal = history.journal = journal
+            self.history = history
             self.selected=None; self.legal_targets=[]
             self.state.move_start_time = time.time()
             messagebox.showinfo("Chargement", "Partie chargée.")
-            self.draw_board(); self.update_ui()
+            self.draw_board(); self.refresh_panel()
         except Exception as e:
             messagebox.showerror("Erreur", f"Impossible de charger :\n{e}")
 
     def undo_last(self):
         # ----- AJOUTS IMPORTANTS-----
-        if self.history.is_empty() or len(self.positions) <= 1:
+        if not self.history.can_undo():
             messagebox.showinfo("Annuler", "Aucun coup à annuler.")
             return
+        self.go_to_ply(self.history.ply - 1)
+        # ----------------------------
 
-        last_move = self.history.pop()
-        self.positions.pop()
-        prev_node = self.positions.tail
-        if not prev_node:
-            initial = GameState(vs_ai=self.state.vs_ai, ai_level=self.state.ai_level)
-            self.state.board = [row[:] for row in initial.board]
-        else:
-            self.state.board = [row[:] for row in prev_node.data]
-        if self.state.move_history:
-            self.state.move_history.pop()
-
-        self.state.white_to_move = not self.state.white_to_move
+    def redo_next(self):
+        if not self.history.can_redo():
+            messagebox.showinfo("Rétablir", "Aucun coup à rétablir.")
+            return
+        self.go_to_ply(self.history.ply + 1)
+
+    def on_log_double_click(self, event):
+        # line n of the log is ply n: back to the position after it (forward too, over the undone moves in gray)
+        line = int(self.move_log.index(f"@{event.x},{event.y}").split('.')[0])
+        offset = len(self.state.move_history) - self.history.ply   # moves loaded without undo records
+        if offset < line <= len(self.history) + offset:
+            self.go_to_ply(line - offset)
+        return "break"
+
+    def go_to_ply(self, ply):
+        self.cancel_ai()
+        self.history.go_to(self.state, ply)
+        self.game_over = False
         self.selected = None
         self.legal_targets = []
+        self.state.move_start_time = time.time()
         self.draw_board()
-        self.update_ui()
-        # ----------------------------
+        self.show_undone()
 
-    def _ai_move(self):
-        if getattr(self, "game_over", False):
-            self.ai_pending = False
+    def _ai_move(self, move, reply=None, promotion=None):
+        if self.game_over:
             return
 
-        gs = {'board': self.state.board, 'can_castle': self.state.can_castle, 'en_passant': self.state.en_passant}
-        ai_func = AI_BY_NAME.get(self.ai_level, list(AI_BY_NAME.values())[0])
-        move = ai_func(gs)
-
-        self.ai_pending = False
-
         if not move:
-            if is_checkmate(self.state.board, self.state.white_to_move, self.state.can_castle, self.state.en_passant):
+            if self.state.status().checkmate:
                 self.game_over = True
                 messagebox.showinfo("Fin de partie", "Échec et mat ! Les Blancs gagnent.")
                 return
-            elif is_stalemate(self.state.board, self.state.white_to_move, self.state.can_castle, self.state.en_passant):
+            elif self.state.status().stalemate:
                 self.game_over = True
                 messagebox.showinfo("Fin de partie", "Pat ! Égalité.")
                 return
@@ -331,36 +465,29 @@ class ChessGUI:
         piece = self.state.board[r1c1[0]][r1c1[1]]
         promote = None
         if piece.upper()=='P' and ((piece.isupper() and r2c2[0]==0) or (piece.islower() and r2c2[0]==7)):
-            promote = 'q' if piece.islower() else 'Q'
-
-        self.state.apply_move(move, promote_to=promote)
+            promote = promotion or ('q' if piece.islower() else 'Q')
 
         # ----- AJOUTS IMPORTANTS-----
-        self.history.push(move)
-        self.positions.append([row[:] for row in self.state.board])
+        self.history.play(self.state, move, promote, dt)
         # ----------------------------
-
-        if self.state.total_time:
-            self.state.remaining_time['B'] -= dt
-            if self.state.remaining_time['B'] < 0:
-                self.state.remaining_time['B'] = 0
-        else:
-            self.state.remaining_time['B'] += dt
-
-        alg = f"{self.idx_to_alg(r1c1[0],r1c1[1])}{self.idx_to_alg(r2c2[0],r2c2[1])}"
-        self.state.move_history.append({'move': move, 'algebraic': alg, 'time': dt, 'player': 'B'})
         self.state.move_start_time = time.time()
         self.draw_board()
-        self.update_ui()
+        self.log_move()
 
-        if is_checkmate(self.state.board, self.state.white_to_move, self.state.can_castle, self.state.en_passant):
+        if self.state.status().checkmate:
             self.game_over = True
             messagebox.showinfo("Fin de partie", "Échec et mat ! Les Noirs gagnent.")
             return
-        if is_stalemate(self.state.board, self.state.white_to_move, self.state.can_castle, self.state.en_passant):
+        if self.state.status().stalemate:
             self.game_over = True
             messagebox.showinfo("Fin de partie", "Pat ! Égalité.")
             return
+        if self.state.draw_reason():
+            self.game_over = True
+            messagebox.showinfo("Fin de partie", f"Partie nulle ({self.state.draw_reason()}).")
+            return
+        if self.ponder and reply:
+            self._start_ponder(reply)
 
 
     def idx_to_alg(self, r, c):